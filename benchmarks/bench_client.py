@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""End-to-end benchmarks of the client against a local stub server.
+
+Measures Datapoint.create at several batch sizes, paged Datapoint.filter
+reads and datastream metadata CRUD, and writes the results as JSON so runs
+can be compared.
+
+Usage::
+
+    $ python -m benchmarks.bench_client --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timedelta
+from dotide import Dotide
+from .stub_server import StubServer
+
+_clock = time.perf_counter
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    index = min(int(round(p / 100.0 * (len(samples) - 1))), len(samples) - 1)
+    return samples[index]
+
+
+def measure(func, iterations, items_per_op=1):
+    """Run func ``iterations`` times and summarize its latency."""
+    latencies = []
+    start = _clock()
+    for i in range(iterations):
+        t = _clock()
+        func(i)
+        latencies.append(_clock() - t)
+    total = _clock() - start
+    return {
+        'ops': iterations,
+        'seconds': total,
+        'ops_per_sec': iterations / total,
+        'items_per_sec': iterations * items_per_op / total,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def points(start, n):
+    return [[start + timedelta(milliseconds=i), float(i)] for i in range(n)]
+
+
+def bench_create(client, batch_size, iterations):
+    t0 = datetime(2014, 1, 1)
+    batches = [points(t0 + timedelta(seconds=i * batch_size), batch_size)
+               for i in range(iterations)]
+    return measure(lambda i: client.datapoints.create('create', batches[i]),
+                   iterations, batch_size)
+
+
+def bench_filter(client, page_size, iterations):
+    t0 = datetime(2015, 1, 1)
+    total = page_size * iterations
+    for i in range(0, total, 10000):
+        client.datapoints.create('filter', points(
+            t0 + timedelta(milliseconds=i), min(10000, total - i)))
+    starts = [t0 + timedelta(milliseconds=i * page_size)
+              for i in range(iterations)]
+    return measure(lambda i: client.datapoints.filter('filter', {
+        'start': starts[i], 'limit': page_size}), iterations, page_size)
+
+
+def bench_metadata(client, iterations):
+    def crud(i):
+        id = 'meta{0}'.format(i)
+        client.datastreams.create({'id': id, 'name': id, 'tags': ['bench']})
+        client.datastreams.get(id)
+        client.datastreams.update(id, {'name': id + '-renamed'})
+        client.datastreams.delete(id)
+    return measure(crud, iterations)
+
+
+def run(quick=False, compress=None, transport='requests'):
+    scale = 10 if quick else 1
+    server = StubServer().start()
+    try:
+        client = Dotide('bench', access_token='token', host=server.host,
+                        secure=False, compress=compress, transport=transport)
+        if transport == 'requests':
+            client.client.session.trust_env = False
+        results = {}
+        for batch_size, iterations in ((1, 2000), (100, 500), (1000, 100),
+                                       (10000, 20)):
+            results['create_batch_{0}'.format(batch_size)] = bench_create(
+                client, batch_size, max(iterations // scale, 2))
+        results['filter_page_1000'] = bench_filter(client, 1000,
+                                                   max(200 // scale, 2))
+        results['metadata_crud'] = bench_metadata(client,
+                                                  max(500 // scale, 2))
+    finally:
+        server.stop()
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'compress': compress,
+            'transport': transport,
+        },
+        'results': results,
+    }
+
+
+def compare(current, previous):
+    print('{0:<22} {1:>14} {2:>14} {3:>8}'.format(
+        'benchmark', 'before ops/s', 'after ops/s', 'change'))
+    for name, result in sorted(current['results'].items()):
+        before = previous['results'].get(name)
+        if before is None:
+            continue
+        change = result['ops_per_sec'] / before['ops_per_sec'] - 1
+        print('{0:<22} {1:>14.1f} {2:>14.1f} {3:>+7.1%}'.format(
+            name, before['ops_per_sec'], result['ops_per_sec'], change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--output', help='Write results to this JSON file.')
+    parser.add_argument('--compare', help='Results file of a previous run.')
+    parser.add_argument('--quick', action='store_true',
+                        help='Run a tenth of the iterations.')
+    parser.add_argument('--compress', choices=['gzip', 'deflate'],
+                        help='Compress request bodies.')
+    parser.add_argument('--transport', choices=['requests', 'http'],
+                        default='requests', help='Client transport.')
+    args = parser.parse_args(argv)
+
+    results = run(quick=args.quick, compress=args.compress,
+                  transport=args.transport)
+    for name, result in sorted(results['results'].items()):
+        print('{0:<22} {1:>10.1f} ops/s {2:>12.1f} items/s '
+              'p50 {3:>8.3f} ms p99 {4:>8.3f} ms'.format(
+                  name, result['ops_per_sec'], result['items_per_sec'],
+                  result['p50_ms'], result['p99_ms']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
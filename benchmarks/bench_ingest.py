@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Throughput of Datapoint.ingest against the number of encoder processes.
+
+By default requests go to an in-memory transport that discards them, so
+only the client side is measured: chunking, handing chunks to the
+workers, JSON encoding, compression and the request path. With
+``--server`` they go over HTTP to the local stub server instead.
+
+Usage::
+
+    $ python -m benchmarks.bench_ingest --workers 0,1,2,4,8 --compress gzip
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timedelta
+from dotide import Dotide
+from dotide.datapoint_batch import DatapointBatch
+from dotide.transport import MemoryTransport
+from .stub_server import StubServer
+
+_clock = time.perf_counter
+
+
+def make_data(streams, points, form):
+    t0 = datetime(2014, 1, 1)
+    data = {}
+    for s in range(streams):
+        pts = [[t0 + timedelta(milliseconds=i), float(i)]
+               for i in range(points)]
+        data['ingest{0}'.format(s)] = DatapointBatch.from_points(pts) \
+            if form == 'batch' else pts
+    return data
+
+
+def run(workers, streams, points, form, compress, server):
+    data = make_data(streams, points, form)
+    total = streams * points
+    results = {}
+    for n in workers:
+        if server is not None:
+            client = Dotide('bench', access_token='token', host=server.host,
+                            secure=False, compress=compress, transport='http')
+        else:
+            client = Dotide('bench', access_token='token', compress=compress,
+                            transport=MemoryTransport(
+                                lambda *args: (201, None)))
+        start = _clock()
+        counts, errors = client.datapoints.ingest(data, processes=n)
+        seconds = _clock() - start
+        if errors:
+            raise next(iter(errors.values()))
+        results[str(n)] = {
+            'points': sum(counts.values()),
+            'seconds': seconds,
+            'points_per_sec': total / seconds,
+        }
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'cpus': os.cpu_count(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'form': form,
+            'compress': compress,
+            'server': server is not None,
+        },
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--workers', default='0,1,2,4',
+                        help='Comma separated encoder process counts.')
+    parser.add_argument('--streams', type=int, default=8)
+    parser.add_argument('--points', type=int, default=250000,
+                        help='Datapoints per datastream.')
+    parser.add_argument('--form', choices=['list', 'batch'], default='list',
+                        help='Pass lists of datapoints or DatapointBatches.')
+    parser.add_argument('--compress', choices=['gzip', 'deflate'],
+                        help='Compress request bodies.')
+    parser.add_argument('--server', action='store_true',
+                        help='Upload to the local stub server.')
+    parser.add_argument('--output', help='Write results to this JSON file.')
+    args = parser.parse_args(argv)
+
+    server = StubServer().start() if args.server else None
+    try:
+        results = run([int(n) for n in args.workers.split(',')],
+                      args.streams, args.points, args.form, args.compress,
+                      server)
+    finally:
+        if server is not None:
+            server.stop()
+    print('{0:>8} {1:>14} {2:>10}'.format('workers', 'points/s', 'seconds'))
+    for n, result in sorted(results['results'].items(),
+                            key=lambda item: int(item[0])):
+        print('{0:>8} {1:>14.0f} {2:>10.2f}'.format(
+            n, result['points_per_sec'], result['seconds']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
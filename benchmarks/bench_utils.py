@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""Microbenchmark for timestamp parsing and formatting in dotide.utils.
+
+Usage::
+
+    $ python -m benchmarks.bench_utils
+"""
+
+import timeit
+from datetime import datetime, timedelta
+from dotide import utils
+
+N = 100000
+
+times = [datetime(2014, 1, 3) + timedelta(milliseconds=37 * i)
+         for i in range(N)]
+strings = [t.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z' for t in times]
+epochs = [int((t - datetime(1970, 1, 1)).total_seconds() * 1000)
+          for t in times]
+
+
+def report(name, func, number=5):
+    seconds = min(timeit.repeat(func, number=1, repeat=number))
+    print('{0:<40} {1:>10.0f} ns/item'.format(name, seconds / N * 1e9))
+
+
+if __name__ == '__main__':
+    report('strptime (baseline)', lambda: [
+        datetime.strptime(s, '%Y-%m-%dT%H:%M:%S.%fZ') for s in strings])
+    report('parse_datetime', lambda: [
+        utils.parse_datetime(s) for s in strings])
+    report('parse_datetimes', lambda: utils.parse_datetimes(strings))
+    report('parse_datetimes (epoch ms)', lambda: utils.parse_datetimes(epochs))
+    report('format_time', lambda: [utils.format_time(t) for t in times])
+    report('format_times', lambda: utils.format_times(times))
@@ -0,0 +1,101 @@
+"""In-process HTTP server exposing the fake Dotide v2 API for benchmarks.
+
+Usage::
+
+    >>> server = StubServer()
+    >>> server.start()
+    >>> client = Dotide('db', access_token='token', host=server.host,
+                        secure=False)
+    >>> server.stop()
+"""
+
+import json
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit, parse_qsl
+from dotide.fake import FakeBackend
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        raw = self._read_body()
+        status, result = self.server.backend.handle(
+            self.command, url.path, dict(parse_qsl(url.query)),
+            raw.decode('utf-8') if raw else None, self.headers)
+        self._send(status, result)
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+                if not size:
+                    break
+            raw = b''.join(chunks)
+        else:
+            raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        encoding = self.headers.get('Content-Encoding')
+        if encoding == 'gzip':
+            raw = zlib.decompress(raw, 16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            raw = zlib.decompress(raw)
+        return raw
+
+    def _send(self, status, result):
+        payload = b'' if result is None else json.dumps(result).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # Room for many clients connecting at once, the default is 5.
+    request_queue_size = 256
+
+
+class StubServer(object):
+
+    """Serve a :class:`dotide.fake.FakeBackend` on a local port from a
+    background thread. Credentials are not checked and datapoint writes
+    create missing datastreams."""
+
+    def __init__(self, port=0):
+        self.httpd = _Server(('127.0.0.1', port), _Handler)
+        self.httpd.backend = FakeBackend(check_auth=False, auto_create=True)
+        self.thread = None
+
+    @property
+    def host(self):
+        return '127.0.0.1:{0}'.format(self.httpd.server_address[1])
+
+    @property
+    def backend(self):
+        return self.httpd.backend
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
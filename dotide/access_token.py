@@ -1,13 +1,19 @@
-import json
-from .utils import format_params
+from .utils import format_params, paginate
 
 
 class AccessToken(object):
 
-    """AccessToken."""
+    """AccessToken.
 
-    def __init__(self, client):
+    :param client: A :class:`dotide.client.Client`.
+    :param cache: Optional :class:`dotide.cache.TTLCache` answering
+                  :meth:`get`. Filled by :meth:`get` and :meth:`filter`,
+                  invalidated by :meth:`update` and :meth:`delete`.
+    """
+
+    def __init__(self, client, cache=None):
         self.client = client
+        self.cache = cache
 
     def filter(self, params=None):
         """Filter AccessTokens.
@@ -20,7 +26,31 @@ class AccessToken(object):
         """
         if params is None:
             params = {}
-        return self.client.get('/access_tokens', params=format_params(params))
+        token = self.cache.token() if self.cache is not None else None
+        access_tokens = self.client.get('/access_tokens',
+                                        params=format_params(params))
+        if self.cache is not None:
+            for access_token in access_tokens:
+                self.cache.set(access_token['access_token'], access_token,
+                               token)
+        return access_tokens
+
+    def iter(self, params=None, page_size=100):
+        """Iterate over all AccessTokens, one page at a time.
+
+        :param dict params: params, as for :meth:`filter`.
+        :param int page_size: AccessTokens fetched per request.
+        :returns: Generator of access_tokens.
+
+        Usage::
+
+            >>> for access_token in client.access_tokens.iter():
+                    print(access_token['access_token'])
+        """
+        def fetch(params):
+            return self.client.get('/access_tokens',
+                                   params=format_params(params), stream=True)
+        return paginate(fetch, params or {}, page_size)
 
     def create(self, data):
         """Create an access_token.
@@ -36,7 +66,8 @@ class AccessToken(object):
                                'ids': ['id0'],
                                'tags': ['tag0']}]})
         """
-        return self.client.post('/access_tokens', data=json.dumps(data))
+        return self.client.post('/access_tokens',
+                                data=self.client.codec.dumps(data))
 
     def get(self, access_token):
         """Get an access_token.
@@ -48,8 +79,16 @@ class AccessToken(object):
 
             >>> access_token = client.access_tokens.get('your_access_token')
         """
-        return self.client.get('/access_tokens/{access_token}'.format(
+        if self.cache is not None:
+            cached = self.cache.get(access_token)
+            if cached is not None:
+                return cached
+            token = self.cache.token()
+        data = self.client.get('/access_tokens/{access_token}'.format(
             access_token=access_token))
+        if self.cache is not None:
+            self.cache.set(access_token, data, token)
+        return data
 
     def update(self, access_token, data):
         """Update an access_token.
@@ -67,9 +106,13 @@ class AccessToken(object):
                                  'global': True}
                             ]})
         """
-        return self.client.put('/access_tokens/{access_token}'.format(
-            access_token=access_token),
-            data=json.dumps(data))
+        try:
+            return self.client.put('/access_tokens/{access_token}'.format(
+                access_token=access_token),
+                data=self.client.codec.dumps(data))
+        finally:
+            if self.cache is not None:
+                self.cache.pop(access_token)
 
     def delete(self, access_token):
         """Delete an access_token.
@@ -81,5 +124,9 @@ class AccessToken(object):
 
             >>> client.access_tokens.delete('your_access_token')
         """
-        return self.client.delete('/access_tokens/{access_token}'.format(
-            access_token=access_token))
+        try:
+            return self.client.delete('/access_tokens/{access_token}'.format(
+                access_token=access_token))
+        finally:
+            if self.cache is not None:
+                self.cache.pop(access_token)
@@ -0,0 +1,171 @@
+import re
+from datetime import timedelta
+from itertools import chain, islice
+from .utils import format_time, to_datetime
+
+FUNCS = ('min', 'max', 'mean', 'sum', 'count', 'first', 'last')
+
+_UNITS = {
+    'ms': 'milliseconds',
+    's': 'seconds',
+    'm': 'minutes',
+    'h': 'hours',
+    'd': 'days',
+    'w': 'weeks',
+}
+_INTERVAL_RE = re.compile(r'^(\d+(?:\.\d+)?)(ms|s|m|h|d|w)$')
+
+
+def parse_interval(interval):
+    """Parse an interval like '30s', '1m', '6h' or '1d' to a timedelta."""
+    if isinstance(interval, timedelta):
+        return interval
+    match = _INTERVAL_RE.match(interval)
+    if match is None:
+        raise ValueError('invalid interval {0!r}'.format(interval))
+    return timedelta(**{_UNITS[match.group(2)]: float(match.group(1))})
+
+
+def _seconds(t, start):
+    return (t - start).total_seconds()
+
+
+def aggregate(points, start, interval, funcs=('min', 'max', 'mean', 'count',
+                                              'last')):
+    """Aggregate ascending datapoints into fixed time buckets.
+
+    Only the running state of the current bucket is kept, so any number of
+    points is aggregated in constant memory. Points with a null value and
+    empty buckets are skipped.
+
+    :param points: Iterable of ``[timestamp, value]`` in ascending order.
+    :param start: Start of the first bucket, datetime or iso8601 string.
+    :param interval: Bucket width, a timedelta or a string like '1m'.
+    :param funcs: Any of :data:`FUNCS`.
+    :returns: Generator of ``[bucket_start, {func: value}]``.
+    """
+    for func in funcs:
+        if func not in FUNCS:
+            raise ValueError('unknown aggregate {0!r}'.format(func))
+    width = parse_interval(interval).total_seconds()
+    if width <= 0:
+        raise ValueError('interval must be positive')
+    return _aggregate(points, to_datetime(start), width, funcs)
+
+
+def _aggregate(points, start, width, funcs):
+    bucket = None
+    for t, v in points:
+        if v is None:
+            continue
+        index = int(_seconds(to_datetime(t), start) // width)
+        if index != bucket:
+            if bucket is not None:
+                yield _emit(start, width, bucket, state, funcs)
+            bucket = index
+            state = [v, v, 0.0, 0, v, v]  # min, max, sum, count, first, last
+        if v < state[0]:
+            state[0] = v
+        if v > state[1]:
+            state[1] = v
+        state[2] += v
+        state[3] += 1
+        state[5] = v
+    if bucket is not None:
+        yield _emit(start, width, bucket, state, funcs)
+
+
+def _emit(start, width, bucket, state, funcs):
+    values = {
+        'min': state[0],
+        'max': state[1],
+        'sum': state[2],
+        'count': state[3],
+        'mean': state[2] / state[3],
+        'first': state[4],
+        'last': state[5],
+    }
+    t = start + timedelta(seconds=bucket * width)
+    return [format_time(t), dict((f, values[f]) for f in funcs)]
+
+
+def lttb(points, start, end, threshold):
+    """Downsample ascending datapoints with Largest-Triangle-Three-Buckets.
+
+    The range is split into ``threshold - 2`` buckets of equal duration and
+    the first and last points are always kept. Only two buckets of points
+    are held at a time. Datapoints with a null value are skipped, and if
+    no more than ``threshold`` remain they are all returned.
+
+    :param points: Iterable of ``[timestamp, value]`` in ascending order.
+    :param start: Range start, datetime or iso8601 string.
+    :param end: Range end, datetime or iso8601 string.
+    :param int threshold: Target number of points, at least 3.
+    :returns: Generator of the selected datapoints.
+    """
+    if threshold < 3:
+        raise ValueError('threshold must be at least 3')
+    start = to_datetime(start)
+    width = _seconds(to_datetime(end), start) / (threshold - 2) or 1.0
+    return _lttb((p for p in points if p[1] is not None), start, width,
+                 threshold)
+
+
+def _lttb(points, start, width, threshold):
+    # Up to ``threshold`` points are returned as they are.
+    head = list(islice(points, threshold + 1))
+    if len(head) <= threshold:
+        for point in head:
+            yield point
+        return
+    selected = None  # (x, y, point) of the last selected point
+    current = next_ = None  # (index, [(x, y, point)])
+    last = None
+    for point in chain(head, points):
+        x = _seconds(to_datetime(point[0]), start)
+        item = (x, point[1], point)
+        last = item
+        if selected is None:
+            selected = item
+            yield point
+            continue
+        index = int(x // width)
+        if next_ is not None and index == next_[0]:
+            next_[1].append(item)
+        elif current is not None and next_ is None and index == current[0]:
+            current[1].append(item)
+        elif current is None:
+            current = (index, [item])
+        elif next_ is None:
+            next_ = (index, [item])
+        else:
+            selected = _pick(selected, current[1], _average(next_[1]))
+            yield selected[2]
+            current, next_ = next_, (index, [item])
+    if current is None:
+        return
+    if next_ is not None:
+        selected = _pick(selected, current[1], _average(next_[1]))
+        yield selected[2]
+        current = next_
+    candidates = [item for item in current[1] if item is not last]
+    if candidates:
+        yield _pick(selected, candidates, last[:2])[2]
+    yield last[2]
+
+
+def _average(items):
+    return (sum(i[0] for i in items) / len(items),
+            sum(i[1] for i in items) / len(items))
+
+
+def _pick(a, bucket, c):
+    """The point of bucket forming the largest triangle with a and c."""
+    ax, ay = a[0], a[1]
+    cx, cy = c
+    best, best_area = None, -1.0
+    for item in bucket:
+        area = abs((ax - cx) * (item[1] - ay) - (ax - item[0]) * (cy - ay))
+        if area > best_area:
+            best, best_area = item, area
+    return best
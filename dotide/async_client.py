@@ -0,0 +1,126 @@
+from .client import _BaseClient, error_message
+from .codec import get_codec
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class AsyncClient(_BaseClient):
+
+    """AsyncClient. Asyncio counterpart of :class:`dotide.client.Client`.
+
+    All API calls are coroutines sharing one ``aiohttp.ClientSession`` whose
+    connector keeps a pool of keep-alive connections, so a single event loop
+    can keep many requests in flight. Requires ``aiohttp``.
+
+    :param str database: Database's name.
+    :param str client_id: Database's client_id.
+    :param str client_secret: Database's client_secret.
+    :param str access_token: Database's access_token.
+    :param str host: Server's hostname, default 'api.dotide.com'.
+    :param str version: API version, default 'v2'.
+    :param bool secure: Whether use ssl, default True.
+    :param int pool_size: Max number of open connections, default 100.
+    :param codec: JSON codec, see :func:`dotide.codec.get_codec`.
+
+    Usage::
+
+      >>> from dotide.async_client import AsyncClient
+      >>> client = AsyncClient('your_database_name', access_token='your_access_token')
+      >>> datastream = await client.get('/datastreams/id0')
+      >>> await client.close()
+    """
+
+    def __init__(self,
+                 database,
+                 client_id=None,
+                 client_secret=None,
+                 access_token=None,
+                 host='api.dotide.com',
+                 version='v2',
+                 secure=True,
+                 pool_size=100,
+                 codec='json'):
+        if aiohttp is None:
+            raise ImportError('AsyncClient requires aiohttp')
+        self.database = database  #: Database's name.
+        self.client_id = client_id  #: Database's client_id.
+        self.client_secret = client_secret  #: Database's client_secret.
+        self.access_token = access_token  #: Database's access_token.
+        self.host = host  #: Server's hostname.
+        self.version = version  #: API version.
+        self.secure = secure  #: Whether use ssl.
+        self.pool_size = pool_size  #: Max number of open connections.
+        self.codec = get_codec(codec)  #: Encodes bodies, decodes responses.
+        self.base_url = self._build_base_url()  #: URL paths are appended to.
+        self.session = None
+        self.headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'dotide.py',
+            'Time-Zone': 'UTC'
+        }
+        auth = self._build_auth()
+        if auth:
+            self.headers['Authorization'] = auth
+
+    def _get_session(self):
+        """Create the session lazily, inside the running event loop."""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def request(self, method, path, params=None, data=None):
+        """Send request to server. See :meth:`dotide.client.Client.request`.
+
+        :param str method: An HTTP method (e.g. 'GET' or 'POST').
+        :param str path: The path URL with leading slash (e.g. '/datastreams').
+        :param dict params: A dictionary of parameters to add to the request.
+        :param data: A json string or bytes. This is the body of the request.
+        :returns: Parsed body.
+        :rtype: dict or list.
+        """
+        if params:
+            params = {k: v for k, v in params.items() if v is not None}
+        session = self._get_session()
+        async with session.request(method,
+                                   self._build_full_url(path),
+                                   params=params or None,
+                                   data=data,
+                                   headers=self.headers) as r:
+            body = await r.read()
+            if r.status >= 400:
+                raise aiohttp.ClientResponseError(
+                    r.request_info, r.history, status=r.status,
+                    message=error_message(self.codec, body, r.reason))
+        return self.codec.loads(body) if body else None
+
+    async def get(self, path, params=None):
+        """GET request."""
+        return await self.request('GET', path, params=params)
+
+    async def post(self, path, data=None):
+        """POST request."""
+        return await self.request('POST', path, data=data)
+
+    async def put(self, path, data=None):
+        """PUT request."""
+        return await self.request('PUT', path, data=data)
+
+    async def delete(self, path, params=None):
+        """DELETE request."""
+        return await self.request('DELETE', path, params=params) is None
+
+    async def close(self):
+        """Close the session and its pooled connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,159 @@
+from .async_client import AsyncClient
+from .codec import encode_datapoints
+from .utils import format_params, format_time
+
+
+class AsyncDatastream(object):
+
+    """Asyncio version of :class:`dotide.datastream.Datastream`."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def filter(self, params=None):
+        """Filter Datastreams.
+
+        Usage::
+
+            >>> datastreams = await client.datastreams.filter({'tags': ['tag0']})
+        """
+        if params is None:
+            params = {}
+        return await self.client.get('/datastreams',
+                                     params=format_params(params))
+
+    async def create(self, data):
+        """Create Datastream."""
+        return await self.client.post('/datastreams',
+                                      data=self.client.codec.dumps(data))
+
+    async def get(self, id):
+        """Get a Datastream."""
+        return await self.client.get('/datastreams/{id}'.format(id=id))
+
+    async def update(self, id, data):
+        """Update a Datastream."""
+        return await self.client.put('/datastreams/{id}'.format(id=id),
+                                     data=self.client.codec.dumps(data))
+
+    async def delete(self, id):
+        """Delete a Datastream."""
+        return await self.client.delete('/datastreams/{id}'.format(id=id))
+
+
+class AsyncDatapoint(object):
+
+    """Asyncio version of :class:`dotide.datapoint.Datapoint`."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def filter(self, id, params=None):
+        """Filter Datapoints.
+
+        Usage::
+
+            >>> datapoints = await client.datapoints.filter(id='id0',
+                                params={'start': datetime(2014, 1, 1),
+                                        'end': datetime.utcnow()})
+        """
+        if params is None:
+            params = {}
+        return await self.client.get(
+            '/datastreams/{id}/datapoints'.format(id=id),
+            params=format_params(params))
+
+    async def create(self, id, data):
+        """Create datapoint(s)."""
+        return await self.client.post(
+            '/datastreams/{id}/datapoints'.format(id=id),
+            data=encode_datapoints(data, self.client.codec))
+
+    async def get(self, id, timestamp):
+        """Get datapoint by timestamp."""
+        return await self.client.get('/datastreams/{id}/datapoints/{t}'.format(
+                                     id=id, t=format_time(timestamp)))
+
+    async def delete(self, id, params):
+        """Delete datapoints."""
+        if params is None:
+            params = {}
+        return await self.client.delete(
+            '/datastreams/{id}/datapoints'.format(id=id),
+            params=format_params(params))
+
+
+class AsyncAccessToken(object):
+
+    """Asyncio version of :class:`dotide.access_token.AccessToken`."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def filter(self, params=None):
+        """Filter AccessTokens."""
+        if params is None:
+            params = {}
+        return await self.client.get('/access_tokens',
+                                     params=format_params(params))
+
+    async def create(self, data):
+        """Create an access_token."""
+        return await self.client.post('/access_tokens',
+                                      data=self.client.codec.dumps(data))
+
+    async def get(self, access_token):
+        """Get an access_token."""
+        return await self.client.get('/access_tokens/{access_token}'.format(
+            access_token=access_token))
+
+    async def update(self, access_token, data):
+        """Update an access_token."""
+        return await self.client.put('/access_tokens/{access_token}'.format(
+            access_token=access_token),
+            data=self.client.codec.dumps(data))
+
+    async def delete(self, access_token):
+        """Delete an access_token."""
+        return await self.client.delete('/access_tokens/{access_token}'.format(
+            access_token=access_token))
+
+
+class AsyncDotide(object):
+
+    """Asyncio version of :class:`dotide.dotide.Dotide`. Requires ``aiohttp``.
+
+    Usage::
+
+        >>> from dotide.async_dotide import AsyncDotide
+        >>> async with AsyncDotide('db', access_token='token') as client:
+        ...     datapoints = await asyncio.gather(*[
+        ...         client.datapoints.filter(id) for id in ids])
+    """
+
+    def __init__(self,
+                 database,
+                 client_id=None,
+                 client_secret=None,
+                 access_token=None,
+                 pool_size=100,
+                 codec='json'):
+        self.client = AsyncClient(database,
+                                  client_id=client_id,
+                                  client_secret=client_secret,
+                                  access_token=access_token,
+                                  pool_size=pool_size,
+                                  codec=codec)
+        self.datastreams = AsyncDatastream(self.client)
+        self.datapoints = AsyncDatapoint(self.client)
+        self.access_tokens = AsyncAccessToken(self.client)
+
+    async def close(self):
+        """Close the underlying connection pool."""
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
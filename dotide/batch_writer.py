@@ -0,0 +1,176 @@
+import atexit
+import logging
+import threading
+import time
+from .utils import format_time
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFullError(Exception):
+
+    """Raised when a write times out waiting for buffer space."""
+
+
+class BatchWriter(object):
+
+    """Buffer datapoints per datastream and upload them in batches.
+
+    A background thread flushes the buffer when it holds ``max_points``
+    points or about ``max_bytes`` of payload, or when the oldest buffered
+    point is ``max_age`` seconds old. Points with a timestamp already in the
+    buffer replace the buffered value. Once ``max_buffered`` points are
+    pending, :meth:`write` blocks until a flush frees space. The buffer is
+    flushed on :meth:`close`, on leaving a ``with`` block and at interpreter
+    exit.
+
+    :param datapoints: A :class:`dotide.datapoint.Datapoint` instance.
+    :param int max_points: Flush once this many points are buffered.
+    :param int max_bytes: Flush once the estimated payload reaches this size.
+    :param float max_age: Flush points buffered for this many seconds.
+    :param int max_buffered: Block writers once this many points are pending.
+    :param on_error: Called as ``on_error(id, points, exc)`` when an upload
+                     fails. Failures are logged if not given.
+
+    Usage::
+
+        >>> with client.datapoints.writer(max_age=0.5) as writer:
+        ...     writer.write('id0', datetime.utcnow(), 1)
+    """
+
+    def __init__(self,
+                 datapoints,
+                 max_points=1000,
+                 max_bytes=1 << 20,
+                 max_age=1.0,
+                 max_buffered=100000,
+                 on_error=None):
+        self.datapoints = datapoints
+        self.max_points = max_points
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_buffered = max(max_buffered, max_points)
+        self.on_error = on_error
+        self._buffers = {}
+        self._count = 0
+        self._bytes = 0
+        self._oldest = None
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+        self._thread = threading.Thread(target=self._run,
+                                        name='dotide-batch-writer')
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, id, timestamp, value, timeout=None):
+        """Buffer a datapoint.
+
+        :param str id: Datastream id.
+        :param timestamp: datetime or iso8601 string.
+        :param value: Datapoint value.
+        :param float timeout: Seconds to wait for buffer space, default
+                              forever.
+        :raises BufferFullError: If no space was freed within ``timeout``.
+        """
+        t = format_time(timestamp)
+        with self._cond:
+            if self._closed:
+                raise ValueError('write to closed BatchWriter')
+            buf = self._buffers.get(id)
+            if buf is None or t not in buf:
+                deadline = None if timeout is None else time.time() + timeout
+                while self._count >= self.max_buffered:
+                    self._cond.notify_all()
+                    remaining = None if deadline is None \
+                        else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise BufferFullError(
+                            'buffer holds {0} points'.format(self._count))
+                    self._cond.wait(remaining)
+                    if self._closed:
+                        raise ValueError('write to closed BatchWriter')
+                buf = self._buffers.setdefault(id, {})
+                if t not in buf:
+                    self._count += 1
+                    self._bytes += len(t) + 8
+            buf[t] = value
+            if self._oldest is None:
+                self._oldest = time.time()
+                self._cond.notify_all()
+            elif self._count >= self.max_points or \
+                    self._bytes >= self.max_bytes:
+                self._cond.notify_all()
+
+    def extend(self, id, data, timeout=None):
+        """Buffer a list of ``[timestamp, value]`` datapoints."""
+        for e in data:
+            self.write(id, e[0], e[1], timeout=timeout)
+
+    def flush(self):
+        """Upload everything buffered so far from the calling thread."""
+        with self._cond:
+            batches = self._drain()
+        self._send(batches)
+
+    def close(self):
+        """Flush the buffer and stop the background thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _due(self):
+        if self._count >= self.max_points or self._bytes >= self.max_bytes:
+            return True
+        return self._oldest is not None and \
+            time.time() - self._oldest >= self.max_age
+
+    def _wait_time(self):
+        if self._oldest is None:
+            return None
+        return max(self._oldest + self.max_age - time.time(), 0)
+
+    def _drain(self):
+        """Take the buffered points. Must hold the lock."""
+        batches = self._buffers
+        self._buffers = {}
+        self._count = 0
+        self._bytes = 0
+        self._oldest = None
+        self._cond.notify_all()
+        return batches
+
+    def _send(self, batches):
+        for id, buf in batches.items():
+            points = [[t, v] for t, v in buf.items()]
+            for i in range(0, len(points), self.max_points):
+                chunk = points[i:i + self.max_points]
+                try:
+                    self.datapoints.create(id, chunk)
+                except Exception as e:
+                    if self.on_error is None:
+                        logger.exception('Failed to write %d datapoints to %s',
+                                         len(chunk), id)
+                    else:
+                        self.on_error(id, chunk, e)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    self._cond.wait(self._wait_time())
+                closed = self._closed
+                batches = self._drain()
+            self._send(batches)
+            if closed:
+                return
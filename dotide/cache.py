@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+_clock = time.monotonic
+
+
+class TTLCache(object):
+
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    Values fetched while another thread invalidates their entry could be
+    stale: take a :meth:`token` before fetching and pass it to :meth:`set`,
+    which then drops the value if the entry was invalidated meanwhile.
+
+    :param int maxsize: Max number of entries. The least recently used entry
+                        is evicted first.
+    :param float ttl: Seconds an entry stays valid.
+    """
+
+    def __init__(self, maxsize=1000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0  #: Lookups answered from the cache.
+        self.misses = 0  #: Lookups that were absent or expired.
+        self._data = OrderedDict()
+        self._generation = 0
+        # Generation of the last invalidation of recently popped keys, and
+        # the newest generation forgotten from it.
+        self._popped = OrderedDict()
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > _clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def token(self):
+        """Return a token to pass to :meth:`set` for a value fetched after
+        this call."""
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, token=None):
+        """Cache a value, unless its entry was invalidated since ``token``
+        was taken."""
+        with self._lock:
+            if token is not None and (token < self._floor or
+                                      self._popped.get(key, token) > token):
+                return
+            self._data[key] = (_clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """Invalidate an entry."""
+        with self._lock:
+            self._data.pop(key, None)
+            self._generation += 1
+            self._popped[key] = self._generation
+            self._popped.move_to_end(key)
+            while len(self._popped) > self.maxsize:
+                self._floor = self._popped.popitem(last=False)[1]
+
+    def clear(self):
+        """Invalidate every entry."""
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self._popped.clear()
+            self._floor = self._generation
+
+    def stats(self):
+        """Return hit/miss counters and current size as a dict."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._data)}
@@ -1,20 +1,67 @@
-import requests
-from requests.auth import HTTPBasicAuth
+import random
+import time
+import zlib
+from types import MappingProxyType
+from base64 import b64encode
+from email.utils import parsedate_tz, mktime_tz
+from .codec import get_codec
+from .json_stream import iter_json_array
+from .singleflight import SingleFlight
+from .transport import IDEMPOTENT_METHODS, HTTPTransport, \
+    RequestsTransport, Transport
 
 
-class TokenAuth(requests.auth.AuthBase):
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+# zlib wbits producing each Content-Encoding.
+COMPRESS_WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+_clock = time.perf_counter
 
-    """AccessToken Auth."""
 
-    def __init__(self, access_token):
-        self.access_token = access_token
+def error_message(codec, content, reason):
+    """Message of an error response: the 'message' of a JSON object body,
+    else the reason phrase, e.g. for the HTML page of a proxy.
 
-    def __call__(self, r):
-        r.headers['Authorization'] = 'Bearer ' + self.access_token
-        return r
+    :param codec: Codec decoding the body.
+    :param bytes content: Response body.
+    :param str reason: HTTP reason phrase.
+    """
+    try:
+        body = codec.loads(content) if content else None
+    except ValueError:
+        body = None
+    message = body.get('message') if isinstance(body, dict) else None
+    return message or reason
+
+
+class _BaseClient(object):
+
+    """URL and Authorization building shared by :class:`Client` and
+    :class:`dotide.async_client.AsyncClient`."""
+
+    def _build_base_url(self):
+        """Build base url."""
+        schema = 'https' if self.secure else 'http'
+        return '{schema}://{host}/{ver}/{db}'.format(schema=schema,
+                                                     host=self.host,
+                                                     ver=self.version,
+                                                     db=self.database)
 
+    def _build_full_url(self, path):
+        """Build full url."""
+        return self.base_url + path
 
-class Client(object):
+    def _build_auth(self):
+        """Build Authorization header value."""
+        if self.client_id and self.client_secret:
+            credentials = '{0}:{1}'.format(self.client_id, self.client_secret)
+            return 'Basic ' + b64encode(
+                credentials.encode('utf-8')).decode('ascii')
+        elif self.access_token:
+            return 'Bearer ' + self.access_token
+        return None
+
+
+class Client(_BaseClient):
 
     """Client. All API calls are made by this class.
 
@@ -25,6 +72,41 @@ class Client(object):
     :param str host: Server's hostname, default 'api.dotide.com'.
     :param str version: API version, default 'v1'.
     :param bool secure: Whether use ssl, default True.
+    :param int pool_connections: Number of connection pools to cache.
+    :param int pool_maxsize: Max connections kept alive per pool.
+    :param float connect_timeout: Seconds to wait for a connection.
+    :param float read_timeout: Seconds to wait between bytes of a response.
+    :param int max_retries: Retries for failed requests, default 0. Idempotent
+                            methods are retried on connection errors and
+                            429/5xx responses, any method on 429. A
+                            Retry-After header overrides the backoff.
+    :param float backoff_factor: Base delay of the exponential backoff.
+    :param float max_backoff: Max delay between two retries.
+    :param str compress: Compress request bodies with 'gzip' or 'deflate'.
+                         Disabled by default. Compressed responses are
+                         always accepted and decoded.
+    :param int compress_threshold: Only compress bodies of at least this
+                                   many bytes.
+    :param codec: JSON codec, 'json' (default), 'orjson', 'ujson' or 'auto'
+                  for the fastest installed of them. See
+                  :func:`dotide.codec.get_codec`.
+    :param transport: 'requests' (default), 'http' for the lean
+                      ``http.client`` transport, or a
+                      :class:`dotide.transport.Transport` instance.
+    :param bool coalesce: Share one request between concurrent identical
+                          GETs, see :attr:`singleflight`. Disabled by
+                          default. Callers then share the returned object.
+    :param bool session_per_thread: Give every thread its own
+                                    ``requests.Session`` over the shared
+                                    connection pool of the requests
+                                    transport, default True.
+
+    A client may be shared between threads. Its URL and headers, including
+    Authorization, are computed once and not modified afterwards. The
+    requests transport gives every thread its own ``requests.Session``,
+    which requests does not guarantee to be thread-safe, unless
+    ``session_per_thread=False`` or a session is assigned to
+    :attr:`session`. The 'http' transport is thread-safe as it is.
 
     Usage::
 
@@ -39,7 +121,20 @@ class Client(object):
                  access_token=None,
                  host='api.dotide.com',
                  version='v2',
-                 secure=True):
+                 secure=True,
+                 pool_connections=10,
+                 pool_maxsize=10,
+                 connect_timeout=None,
+                 read_timeout=None,
+                 max_retries=0,
+                 backoff_factor=0.5,
+                 max_backoff=30,
+                 compress=None,
+                 compress_threshold=1024,
+                 codec='json',
+                 transport='requests',
+                 coalesce=False,
+                 session_per_thread=True):
         self.database = database  # : Database's name.
         self.client_id = client_id  # : Database's client_id.
         self.client_secret = client_secret  #: Database's client_secret.
@@ -47,36 +142,62 @@ class Client(object):
         self.host = host  #: Server's hostname.
         self.version = version  #: API version.
         self.secure = secure  #: Whether use ssl.
-        self.session = requests.Session()
-        self.headers = {
+        self.timeout = (connect_timeout, read_timeout)  #: Request timeouts.
+        self.max_retries = max_retries  #: Retries for failed requests.
+        self.backoff_factor = backoff_factor  #: Base delay between retries.
+        self.max_backoff = max_backoff  #: Max delay between retries.
+        if compress is not None and compress not in COMPRESS_WBITS:
+            raise ValueError('compress must be one of {0}'.format(
+                sorted(COMPRESS_WBITS)))
+        self.compress = compress  #: Request body Content-Encoding.
+        self.compress_threshold = compress_threshold  #: Min size to compress.
+        self.codec = get_codec(codec)  #: Encodes bodies, decodes responses.
+        self.pool_maxsize = pool_maxsize  #: Max connections kept per pool.
+        if transport == 'requests':
+            transport = RequestsTransport(pool_connections, pool_maxsize,
+                                          per_thread=session_per_thread)
+        elif transport == 'http':
+            transport = HTTPTransport(pool_maxsize)
+        elif not isinstance(transport, Transport):
+            raise ValueError('unknown transport {0!r}'.format(transport))
+        self.transport = transport  #: Sends requests.
+        self.base_url = self._build_base_url()  #: URL paths are appended to.
+        headers = {
             'Content-Type': 'application/json',
             'User-Agent': 'dotide.py',
-            'Time-Zone': 'UTC'
+            'Time-Zone': 'UTC',
+            'Accept-Encoding': 'gzip, deflate'
         }
+        auth = self._build_auth()
+        if auth:
+            headers['Authorization'] = auth
+        #: Headers of every request, read-only.
+        self.headers = MappingProxyType(headers)
+        #: Callbacks run around every request. Each receives an event dict
+        #: with 'method', 'path', 'params' and 'request_bytes'; after the
+        #: response it also holds 'status_code', 'response_bytes',
+        #: 'retries', 'elapsed' and 'error'. For streamed requests
+        #: 'after_response' runs once the body is exhausted or closed, so
+        #: these cover reading the whole body.
+        self.hooks = {'before_request': [], 'after_response': []}
+        #: :class:`dotide.singleflight.SingleFlight` deduplicating concurrent
+        #: GETs with the same path and params, or None. Its counters tell
+        #: how many requests were coalesced.
+        self.singleflight = SingleFlight() if coalesce else None
 
-    def _build_base_url(self):
-        """Build base url."""
-        schema = 'https' if self.secure else 'http'
-        return '{schema}://{host}/{ver}/{db}'.format(schema=schema,
-                                                     host=self.host,
-                                                     ver=self.version,
-                                                     db=self.database)
-
-    def _build_full_url(self, path):
-        """Build full url."""
-        return self._build_base_url() + path
+    @property
+    def session(self):
+        """``requests.Session`` of the requests transport, the calling
+        thread's one with ``session_per_thread``. Assigning a session makes
+        all threads share it."""
+        return self.transport.session
 
-    def _build_auth(self):
-        """Build auth."""
-        if self.client_id and self.client_secret:
-            auth = HTTPBasicAuth(self.client_id, self.client_secret)
-        elif self.access_token:
-            auth = TokenAuth(self.access_token)
-        else:
-            auth = None
-        return auth
+    @session.setter
+    def session(self, session):
+        self.transport.session = session
 
-    def request(self, method, path, params=None, data=None):
+    def request(self, method, path, params=None, data=None, stream=False,
+                content_encoding=None):
         """An internal method that send request to server.
         It is exposed if you need to make API calls not implemented in this
         library or if you need to debug requests.
@@ -84,29 +205,193 @@ class Client(object):
         :param str method: An HTTP method (e.g. 'GET' or 'POST').
         :param str path: The path URL with leading slash (e.g. '/datastreams').
         :param dict params: A dictionary of parameters to add to the request.
-        :param str data: A json string. This is the body of the request.
+        :param data: A json string or bytes. This is the body of the request.
+        :param bool stream: Decode the body incrementally and return a
+                            generator over the elements of the JSON array.
+        :param str content_encoding: Encoding of a ``data`` already
+                                     compressed with 'gzip' or 'deflate'.
+                                     It is sent as is.
         :returns: Parsed body.
         :rtype: dict or list.
         """
-        r = self.session.request(method,
-                                 self._build_full_url(path),
-                                 params=params,
-                                 data=data,
-                                 headers=self.headers,
-                                 auth=self._build_auth())
-
-        data = r.json() if r.content else None
+        if self.singleflight is not None and method == 'GET' and not stream:
+            key = (path, tuple(sorted(params.items())) if params else ())
+            try:
+                hash(key)
+            except TypeError:
+                pass
+            else:
+                return self.singleflight.do(key, lambda: self._observe(
+                    method, path, params, data, stream, content_encoding))
+        return self._observe(method, path, params, data, stream,
+                             content_encoding)
+
+    def _observe(self, method, path, params, data, stream, content_encoding):
+        """Send a request, running hooks around it if any are installed."""
+        if not (self.hooks['before_request'] or self.hooks['after_response']):
+            return self._request(method, path, params, data, stream,
+                                 content_encoding, None)
+        event = {'method': method,
+                 'path': path,
+                 'params': params,
+                 'request_bytes': len(data) if data else 0,
+                 'status_code': None,
+                 'response_bytes': None,
+                 'retries': 0,
+                 'error': None}
+        for hook in self.hooks['before_request']:
+            hook(event)
+        start = _clock()
+        try:
+            result = self._request(method, path, params, data, stream,
+                                   content_encoding, event)
+        except Exception as e:
+            self._finish(event, start, e)
+            raise
+        if stream:
+            return self._observe_stream(result, event, start)
+        self._finish(event, start)
+        return result
+
+    def _observe_stream(self, items, event, start):
+        """Yield a streamed body, running 'after_response' hooks once it
+        is read."""
+        error = None
+        try:
+            for item in items:
+                yield item
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._finish(event, start, error)
+
+    def _finish(self, event, start, error=None):
+        """Complete an event and run 'after_response' hooks."""
+        event['error'] = error
+        event['elapsed'] = _clock() - start
+        for hook in self.hooks['after_response']:
+            hook(event)
+
+    def _request(self, method, path, params, data, stream, content_encoding,
+                 event):
+        """Send a request, retrying as configured. ``event`` is filled with
+        the outcome when hooks are installed."""
+        url = self.base_url + path
+        headers = self.headers
+        compress = self.compress and data and not content_encoding and \
+            len(data) >= self.compress_threshold
+        if compress or content_encoding:
+            headers = dict(headers, **{
+                'Content-Encoding': content_encoding or self.compress})
+        attempt = 0
+        while True:
+            if event is not None:
+                event['retries'] = attempt
+            try:
+                r = self.transport.request(method,
+                                           url,
+                                           params=params,
+                                           data=self._iter_compressed(data)
+                                           if compress else data,
+                                           headers=headers,
+                                           timeout=self.timeout,
+                                           stream=stream)
+            except self.transport.errors:
+                if attempt >= self.max_retries or \
+                        method not in IDEMPOTENT_METHODS:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if not self._should_retry(method, r, attempt):
+                    break
+                delay = self._retry_after(r)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                r.close()
+            time.sleep(delay)
+            attempt += 1
+
+        if event is not None:
+            event['status_code'] = r.status_code
+            event['response_bytes'] = 0 if stream and r.status_code < 400 \
+                else len(r.content or b'')
+        if stream and r.status_code < 400:
+            return self._iter_response(r, event)
         if r.status_code >= 400:
-            raise requests.exceptions.HTTPError(data['message'], response=r)
-        return data
+            raise self.transport.HTTPError(
+                error_message(self.codec, r.content, r.reason), response=r)
+        return self.codec.loads(r.content) if r.content else None
+
+    def _iter_compressed(self, data, chunk_size=64 * 1024):
+        """Compress a body chunk by chunk, so it is sent with chunked
+        transfer encoding without building the compressed body in memory.
+        A new generator is made for every attempt, so retries resend the
+        whole body."""
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        compressor = zlib.compressobj(6, zlib.DEFLATED,
+                                      COMPRESS_WBITS[self.compress])
+        for i in range(0, len(data), chunk_size):
+            chunk = compressor.compress(data[i:i + chunk_size])
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+    def _should_retry(self, method, r, attempt):
+        """Whether a response should be retried."""
+        if attempt >= self.max_retries or r.status_code not in RETRY_STATUSES:
+            return False
+        return r.status_code == 429 or method in IDEMPOTENT_METHODS
+
+    def _backoff(self, attempt):
+        """Exponential backoff with full jitter."""
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return random.uniform(0, delay)
+
+    @staticmethod
+    def _retry_after(r):
+        """Seconds to wait from a Retry-After header, or None."""
+        value = r.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            parsed = parsedate_tz(value)
+            if parsed is None:
+                return None
+            return max(mktime_tz(parsed) - time.time(), 0)
+
+    def _iter_response(self, r, event=None, chunk_size=64 * 1024):
+        """Yield elements of a streamed JSON array response, counting the
+        bytes read into ``event['response_bytes']``."""
+        chunks = r.iter_content(chunk_size)
+        try:
+            for item in iter_json_array(chunks if event is None else
+                                        self._count_bytes(chunks, event)):
+                yield item
+        finally:
+            # Closed first, so a body abandoned at the closing bracket is
+            # drained and its connection reused.
+            chunks.close()
+            r.close()
+
+    @staticmethod
+    def _count_bytes(chunks, event):
+        """Pass chunks through, adding their size to the event."""
+        for chunk in chunks:
+            event['response_bytes'] += len(chunk)
+            yield chunk
 
-    def get(self, path, params=None):
+    def get(self, path, params=None, stream=False):
         """GET request."""
-        return self.request('GET', path, params=params)
+        return self.request('GET', path, params=params, stream=stream)
 
-    def post(self, path, data=None):
+    def post(self, path, data=None, content_encoding=None):
         """POST request."""
-        return self.request('POST', path, data=data)
+        return self.request('POST', path, data=data,
+                            content_encoding=content_encoding)
 
     def put(self, path, data=None):
         """PUT request."""
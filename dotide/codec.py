@@ -0,0 +1,131 @@
+import json
+from datetime import datetime
+from .columnar import encode_arrays, is_columnar
+from .datapoint_batch import DatapointBatch
+
+
+def _default(v):
+    """Serialize datetimes the way :func:`dotide.utils.format_time` does."""
+    if isinstance(v, datetime):
+        return v.isoformat() + 'Z'
+    raise TypeError('{0!r} is not JSON serializable'.format(v))
+
+
+class JsonCodec(object):
+
+    """Codec on the standard library json module."""
+
+    name = 'json'
+
+    def dumps(self, obj):
+        """Encode obj to JSON bytes."""
+        return json.dumps(obj, default=_default,
+                          separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        """Decode JSON bytes or text."""
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+
+class OrjsonCodec(object):
+
+    """Codec on orjson. Naive datetimes are serialized natively as UTC.
+
+    Unlike :class:`JsonCodec`, dict keys must be str, ints must fit in 64
+    bits when encoded and larger ones decode as floats, NaN and infinity
+    are encoded as null, and aware datetimes keep their UTC offset.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError('OrjsonCodec requires orjson')
+        self._orjson = orjson
+        self.option = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+    def dumps(self, obj):
+        """Encode obj to JSON bytes."""
+        return self._orjson.dumps(obj, default=_default, option=self.option)
+
+    def loads(self, data):
+        """Decode JSON bytes or text."""
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(object):
+
+    """Codec on ujson.
+
+    Unlike :class:`JsonCodec`, NaN and infinity are encoded as bare
+    ``NaN`` and ``Inf``, which the API may reject.
+    """
+
+    name = 'ujson'
+
+    def __init__(self):
+        try:
+            import ujson
+        except ImportError:
+            raise ImportError('UjsonCodec requires ujson')
+        self._ujson = ujson
+
+    def dumps(self, obj):
+        """Encode obj to JSON bytes."""
+        return self._ujson.dumps(obj, default=_default,
+                                 ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        """Decode JSON bytes or text."""
+        return self._ujson.loads(data)
+
+
+CODECS = {
+    'json': JsonCodec,
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+}
+
+
+def get_codec(codec='json'):
+    """Return a codec instance.
+
+    :param codec: A name in :data:`CODECS`, 'auto' for the fastest
+                  installed library, or an object with ``dumps`` returning
+                  bytes and ``loads``. The fast libraries are opt-in as they
+                  do not encode and decode every value as json does.
+    """
+    if codec == 'auto':
+        # The fast libraries are imported only here and by their codecs.
+        for cls in (OrjsonCodec, UjsonCodec):
+            try:
+                return cls()
+            except ImportError:
+                pass
+        return JsonCodec()
+    if isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError('codec must be one of {0}'.format(
+                sorted(CODECS)))
+        return CODECS[codec]()
+    return codec
+
+
+def encode_datapoints(data, codec):
+    """Serialize datapoints to a JSON array body.
+
+    :param data: List of datapoints, a DatapointBatch, a
+                 ``(timestamps, values)`` tuple of numpy arrays, or a pandas
+                 Series/DataFrame indexed by time.
+    :param codec: Codec used for lists of datapoints.
+    :returns: Body bytes.
+    """
+    if isinstance(data, DatapointBatch):
+        return data.to_json()
+    if is_columnar(data):
+        return encode_arrays(data).encode('utf-8')
+    return codec.dumps(data)
@@ -0,0 +1,77 @@
+import sys
+
+
+def _require_numpy():
+    # Imported on first use, so ``import dotide`` does not pay for numpy.
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('columnar datapoints require numpy')
+    return numpy
+
+
+def is_columnar(data):
+    """Whether data is a ``(timestamps, values)`` array pair or pandas
+    Series/DataFrame rather than a list of datapoints."""
+    if type(data).__module__.split('.')[0] == 'pandas':
+        return True
+    np = sys.modules.get('numpy')
+    return (np is not None and isinstance(data, tuple) and len(data) == 2
+            and isinstance(data[0], np.ndarray))
+
+
+def to_arrays(data):
+    """Convert a list of ``[iso8601, value]`` datapoints to arrays.
+
+    :param list data: Datapoints as returned by the API.
+    :returns: ``(timestamps, values)`` as ``datetime64[us]`` and ``float64``
+              arrays.
+    """
+    np = _require_numpy()
+    if not data:
+        return (np.array([], dtype='datetime64[us]'),
+                np.array([], dtype='float64'))
+    columns = np.array(data, dtype=object)
+    timestamps = np.char.rstrip(columns[:, 0].astype('U'), 'Z')
+    values = columns[:, 1]
+    values[values == None] = np.nan  # noqa: E711
+    return (timestamps.astype('datetime64[us]'), values.astype('float64'))
+
+
+def _from_pandas(data):
+    if hasattr(data, 'columns'):
+        if len(data.columns) == 1:
+            data = data.iloc[:, 0]
+        elif 'value' in data.columns:
+            data = data['value']
+        else:
+            raise ValueError('DataFrame needs a single column or a '
+                             '"value" column')
+    index = data.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.values, data.to_numpy(dtype='float64')
+
+
+def encode_arrays(data):
+    """Serialize columnar datapoints to a JSON body without a Python loop
+    per element.
+
+    :param data: ``(timestamps, values)`` arrays or pandas Series/DataFrame
+                 indexed by time.
+    :returns: JSON string, a list of ``[iso8601, value]`` pairs.
+    """
+    np = _require_numpy()
+    if isinstance(data, tuple):
+        timestamps, values = data
+    else:
+        timestamps, values = _from_pandas(data)
+    timestamps = np.asarray(timestamps).astype('datetime64[us]')
+    values = np.asarray(values, dtype='float64')
+    if timestamps.shape != values.shape:
+        raise ValueError('timestamps and values differ in length')
+    t = np.datetime_as_string(timestamps, unit='us')
+    v = values.astype('U32')
+    v[~np.isfinite(values)] = 'null'
+    rows = np.char.add(np.char.add(np.char.add('["', t), 'Z",'), v)
+    return '[' + '],'.join(rows.tolist()) + (']]' if len(rows) else ']')
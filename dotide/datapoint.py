@@ -1,22 +1,41 @@
-import json
-from .utils import format_params, format_time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, \
+    FIRST_COMPLETED
+from datetime import datetime, timedelta
+from . import aggregate, ingest
+from .batch_writer import BatchWriter
+from .spool import Spool
+from .codec import encode_datapoints
+from .columnar import is_columnar, to_arrays
+from .datapoint_batch import DatapointBatch
+from .datastream import Datastream
+from .follow import Follower, follow
+from .utils import format_params, format_time, parse_datetime, to_datetime
 
 
 class Datapoint(object):
 
-    """Datapoint."""
+    """Datapoint.
 
-    def __init__(self, client):
-        self.client = client
+    :param client: A :class:`dotide.client.Client`.
+    :param range_cache: Optional :class:`dotide.range_cache.RangeCache` used
+                        by :meth:`window`. Invalidated by :meth:`create` and
+                        :meth:`delete`.
+    """
 
-    def _format_data(self, data):
-        return [[format_time(e[0]), e[1]] for e in data]
+    def __init__(self, client, range_cache=None):
+        self.client = client
+        self.range_cache = range_cache
 
-    def filter(self, id, params=None):
+    def filter(self, id, params=None, as_arrays=False, as_batch=False):
         """Filter Datapoints.
 
         :param str id: Datastream id.
         :param dict params: Params.
+        :param bool as_arrays: Return a ``(timestamps, values)`` tuple of
+                               ``datetime64[us]`` and ``float64`` numpy
+                               arrays instead. Requires numpy.
+        :param bool as_batch: Return a
+                              :class:`dotide.datapoint_batch.DatapointBatch`.
         :returns: List of datapoints.
 
         Usage::
@@ -30,14 +49,303 @@ class Datapoint(object):
         """
         if params is None:
             params = {}
-        return self.client.get('/datastreams/{id}/datapoints'.format(id=id),
+        data = self.client.get('/datastreams/{id}/datapoints'.format(id=id),
                                params=format_params(params))
+        if as_arrays:
+            return to_arrays(data)
+        return DatapointBatch.from_points(data) if as_batch else data
+
+    def iter(self, id, start=None, end=None, page_size=1000, order='asc'):
+        """Iterate over datapoints in a time range, one page at a time.
+
+        Pages are requested from the last timestamp seen rather than by
+        offset, so late pages cost the server as little as early ones. Pages
+        are decoded as they stream in, so only the current datapoint and one
+        read chunk are held in memory.
+
+        :param str id: Datastream id.
+        :param start: Range start, datetime or iso8601 string.
+        :param end: Range end, datetime or iso8601 string.
+        :param int page_size: Datapoints fetched per request, at least 2 as
+                              each page repeats the last point of the
+                              previous one.
+        :param str order: 'asc' or 'desc'.
+        :returns: Generator of datapoints.
+
+        Usage::
+
+            >>> for t, v in client.datapoints.iter('id0',
+                                start=datetime(2014, 1, 1),
+                                end=datetime.utcnow()):
+                    print(t, v)
+        """
+        if page_size < 2:
+            raise ValueError('page_size must be at least 2')
+        return self._iter(id, start, end, page_size, order)
+
+    def _iter(self, id, start, end, page_size, order):
+        params = {'order': order, 'limit': page_size}
+        if start is not None:
+            params['start'] = start
+        if end is not None:
+            params['end'] = end
+        bound = 'start' if order == 'asc' else 'end'
+        path = '/datastreams/{id}/datapoints'.format(id=id)
+        last = None
+        while True:
+            page = self.client.get(path, params=format_params(params),
+                                   stream=True)
+            count = fresh = 0
+            boundary = last
+            for point in page:
+                count += 1
+                last = point[0]
+                if point[0] == boundary:
+                    continue
+                fresh += 1
+                yield point
+            if count < page_size or not fresh:
+                return
+            params[bound] = last
+
+    def aggregate(self, id, start, end,
+                  interval='1m',
+                  funcs=('min', 'max', 'mean', 'count', 'last'),
+                  page_size=1000):
+        """Aggregate datapoints into time buckets as they stream in.
+
+        :param str id: Datastream id.
+        :param start: Range start, datetime or iso8601 string. Buckets are
+                      aligned to it.
+        :param end: Range end, datetime or iso8601 string.
+        :param interval: Bucket width, e.g. '30s', '1m', '1h' or a timedelta.
+        :param funcs: Any of 'min', 'max', 'mean', 'sum', 'count', 'first'
+                      and 'last'.
+        :param int page_size: Datapoints fetched per request.
+        :returns: Generator of ``[bucket_start, {func: value}]``.
+
+        Usage::
+
+            >>> for t, stats in client.datapoints.aggregate('id0',
+                                    datetime(2014, 1, 1),
+                                    datetime(2014, 2, 1),
+                                    interval='1h'):
+                    print(t, stats['mean'])
+        """
+        return aggregate.aggregate(self.iter(id, start, end,
+                                             page_size=page_size),
+                                   start, interval, funcs)
+
+    def downsample(self, id, start, end, threshold, page_size=1000):
+        """Downsample datapoints to about ``threshold`` points with LTTB.
+
+        :param str id: Datastream id.
+        :param start: Range start, datetime or iso8601 string.
+        :param end: Range end, datetime or iso8601 string.
+        :param int threshold: Target number of points.
+        :param int page_size: Datapoints fetched per request.
+        :returns: Generator of datapoints.
+
+        Usage::
+
+            >>> datapoints = list(client.datapoints.downsample('id0',
+                                    datetime(2014, 1, 1),
+                                    datetime(2014, 2, 1),
+                                    threshold=1000))
+        """
+        return aggregate.lttb(self.iter(id, start, end, page_size=page_size),
+                              start, end, threshold)
+
+    def follow(self, id, since=None, min_interval=1.0, max_interval=30.0,
+               page_size=1000, stop=None):
+        """Yield new datapoints of a datastream as they arrive.
+
+        Each poll asks only for datapoints after the last timestamp seen.
+        The poll interval shrinks while data arrives and grows while it
+        does not.
+
+        :param str id: Datastream id.
+        :param since: Only yield datapoints after this time, default now.
+        :param float min_interval: Shortest delay between polls.
+        :param float max_interval: Longest delay between polls.
+        :param int page_size: Datapoints fetched per request.
+        :param stop: Optional ``threading.Event`` ending the generator.
+        :returns: Generator of datapoints.
+
+        Usage::
+
+            >>> for t, v in client.datapoints.follow('id0'):
+                    print(t, v)
+        """
+        return follow(self, id, since, min_interval, max_interval, page_size,
+                      stop)
+
+    def follow_many(self, ids, callback, **kwargs):
+        """Follow many datastreams from a small pool of pollers.
+
+        :param list ids: Datastream ids.
+        :param callback: Called with ``(id, points)`` for new datapoints.
+        :param kwargs: Options of :class:`dotide.follow.Follower`.
+        :returns: A running Follower. Call its ``stop()`` when done.
+
+        Usage::
+
+            >>> follower = client.datapoints.follow_many(
+                    ['id0', 'id1'], lambda id, points: print(id, points),
+                    workers=2)
+        """
+        return Follower(self, ids, callback, **kwargs)
+
+    def window(self, id, start, end):
+        """Get the datapoints in ``[start, end)``, in ascending order.
+
+        With a :attr:`range_cache`, only the parts of the range not cached
+        yet are fetched and then merged into the cache.
+
+        :param str id: Datastream id.
+        :param start: Range start, datetime or iso8601 string.
+        :param end: Range end (excluded), datetime or iso8601 string.
+        :returns: List of datapoints.
+
+        Usage::
+
+            >>> datapoints = client.datapoints.window('id0',
+                                datetime.utcnow() - timedelta(hours=1),
+                                datetime.utcnow())
+        """
+        start, end = to_datetime(start), to_datetime(end)
+        if self.range_cache is None:
+            return self._fetch_shard(id, start, end, 1000)
+        gaps, token = self.range_cache.gaps(id, start, end)
+        for gap_start, gap_end in gaps:
+            points = self._fetch_shard(id, gap_start, gap_end, 1000)
+            times = [parse_datetime(p[0]) for p in points]
+            self.range_cache.fill(id, gap_start, gap_end, times, points, token)
+        if gaps and self.range_cache.gaps(id, start, end)[0]:
+            # Invalidated or evicted meanwhile, read the range directly.
+            return self._fetch_shard(id, start, end, 1000)
+        return self.range_cache.get(id, start, end)
+
+    def filter_many(self, ids=None, tags=None, start=None, end=None,
+                    page_size=1000, workers=None, stream=False):
+        """Fetch the same time range from many datastreams concurrently.
+
+        :param list ids: Datastream ids.
+        :param list tags: Select every datastream with any of these tags,
+                          paging through the datastream listing.
+        :param start: Range start, datetime or iso8601 string.
+        :param end: Range end, datetime or iso8601 string.
+        :param int page_size: Datapoints fetched per request.
+        :param int workers: Concurrent requests, default the client's
+                            ``pool_maxsize``.
+        :param bool stream: Return a generator of ``(id, datapoints)``
+                            yielded as each datastream completes.
+        :returns: Dict of id to list of datapoints.
+
+        Usage::
+
+            >>> series = client.datapoints.filter_many(tags=['tag0'],
+                                start=datetime(2014, 1, 1),
+                                end=datetime.utcnow())
+        """
+        if tags:
+            selected = [d['id'] for d in Datastream(self.client).iter(
+                {'ids': ids, 'tags': tags} if ids else {'tags': tags})]
+        else:
+            selected = list(ids or [])
+        results = self._iter_many(selected, start, end, page_size,
+                                  workers or self.client.pool_maxsize)
+        return results if stream else dict(results)
+
+    def _iter_many(self, ids, start, end, page_size, workers):
+        if not ids:
+            return
+
+        def fetch(id):
+            return list(self.iter(id, start, end, page_size=page_size))
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(ids))) \
+                as executor:
+            futures = {executor.submit(fetch, id): id for id in ids}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _fetch_shard(self, id, start, end, page_size):
+        """Fetch ``[start, end)`` of a datastream in ascending order."""
+        points = list(self.iter(id, start, end, page_size=page_size))
+        while points and parse_datetime(points[-1][0]) >= end:
+            points.pop()
+        return points
+
+    def fetch_range(self, id, start, end=None, page_size=1000, workers=8,
+                    order='asc'):
+        """Fetch all datapoints in a time range with concurrent requests.
+
+        The range is split into sub-ranges fetched on a thread pool. The
+        sub-range width follows the point density observed so far, so that
+        each request returns about one full page.
+
+        :param str id: Datastream id.
+        :param start: Range start, datetime or iso8601 string.
+        :param end: Range end, datetime or iso8601 string, default now.
+        :param int page_size: Datapoints fetched per request.
+        :param int workers: Number of concurrent requests.
+        :param str order: 'asc' or 'desc'.
+        :returns: List of datapoints.
+
+        Usage::
+
+            >>> datapoints = client.datapoints.fetch_range('id0',
+                                start=datetime(2014, 1, 1),
+                                end=datetime(2015, 1, 1),
+                                workers=16)
+        """
+        start = to_datetime(start)
+        end = to_datetime(end) if end is not None else datetime.utcnow()
+        probe = self.filter(id, {'start': start, 'end': end,
+                                 'order': 'asc', 'limit': page_size})
+        if len(probe) < page_size:
+            return probe if order == 'asc' else probe[::-1]
+
+        cursor = parse_datetime(probe[-1][0])
+        shards = [[p for p in probe if parse_datetime(p[0]) < cursor]]
+        seen_points = len(shards[0])
+        seen_seconds = (cursor - start).total_seconds()
+        width = max(seen_seconds, 0.001)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while cursor < end or pending:
+                while cursor < end and len(pending) < workers:
+                    if seen_points:
+                        width = max(page_size * seen_seconds / seen_points,
+                                    0.001)
+                    else:
+                        width *= 2
+                    shard_end = min(cursor + timedelta(seconds=width), end)
+                    if shard_end == end:
+                        shard_end = end + timedelta(microseconds=1)
+                    future = executor.submit(self._fetch_shard, id, cursor,
+                                             shard_end, page_size)
+                    pending[future] = (len(shards), cursor, shard_end)
+                    shards.append(None)
+                    cursor = shard_end
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, shard_start, shard_end = pending.pop(future)
+                    shards[index] = future.result()
+                    seen_points += len(shards[index])
+                    seen_seconds += (shard_end - shard_start).total_seconds()
+
+        points = [p for shard in shards for p in shard]
+        return points if order == 'asc' else points[::-1]
 
     def create(self, id, data):
         """Create datapoint(s).
 
         :param str id: Datastream id.
-        :param list data: List of datapoints.
+        :param list data: List of datapoints, a DatapointBatch, a
+                          ``(timestamps, values)`` tuple of numpy arrays, or
+                          a pandas Series/DataFrame indexed by time.
         :returns: Created datapoint(s).
 
         Usage::
@@ -46,8 +354,67 @@ class Datapoint(object):
                                 data=[[datetime.utcnow(), 1],
                                     [datetime.utcnow(), 2]])
         """
-        return self.client.post('/datastreams/{id}/datapoints'.format(id=id),
-                                data=json.dumps(self._format_data(data)))
+        body = encode_datapoints(data, self.client.codec)
+        try:
+            return self.client.post(
+                '/datastreams/{id}/datapoints'.format(id=id), data=body)
+        finally:
+            if isinstance(data, DatapointBatch):
+                self._invalidate(id, (data.start, data.end) if data else ())
+            elif is_columnar(data):
+                self._invalidate(id, ())
+            else:
+                self._invalidate(id, (e[0] for e in data))
+
+    def create_many(self, data, workers=None):
+        """Create datapoints in many datastreams concurrently.
+
+        Batches are sent from a pool of ``workers`` threads sharing the
+        client's connection pool. A failed batch does not stop the others.
+
+        :param dict data: Datastream id to list of datapoints.
+        :param int workers: Concurrent requests, default the client's
+                            ``pool_maxsize``.
+        :returns: ``(results, errors)``, dicts of id to created datapoints
+                  and id to the exception raised for it.
+
+        Usage::
+
+            >>> results, errors = client.datapoints.create_many({
+                    'id0': [[datetime.utcnow(), 1]],
+                    'id1': [[datetime.utcnow(), 2]]})
+        """
+        results = {}
+        errors = {}
+        if not data:
+            return results, errors
+        workers = min(workers or self.client.pool_maxsize, len(data))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.create, id, points): id
+                       for id, points in data.items()}
+            for future in as_completed(futures):
+                id = futures[future]
+                try:
+                    results[id] = future.result()
+                except Exception as e:
+                    errors[id] = e
+        return results, errors
+
+    def ingest(self, data, **kwargs):
+        """Bulk load datapoints, serializing them in a pool of processes.
+
+        See :func:`dotide.ingest.ingest` for the options.
+
+        :param dict data: Datastream id to datapoints.
+        :returns: ``(counts, errors)``, dicts of id to the number of
+                  datapoints uploaded and id to the exception raised for it.
+
+        Usage::
+
+            >>> counts, errors = client.datapoints.ingest(
+                    {'id0': batch0, 'id1': batch1}, processes=8)
+        """
+        return ingest.ingest(self, data, **kwargs)
 
     def get(self, id, timestamp):
         """Get datapoint by timestamp.
@@ -79,5 +446,54 @@ class Datapoint(object):
         """
         if params is None:
             params = {}
-        return self.client.delete('/datastreams/{id}/datapoints'.format(id=id),
-                                  params=format_params(params))
+        try:
+            return self.client.delete(
+                '/datastreams/{id}/datapoints'.format(id=id),
+                params=format_params(params))
+        finally:
+            if 'start' in params and 'end' in params:
+                self._invalidate(id, (params['start'], params['end']))
+            else:
+                self._invalidate(id, ())
+
+    def _invalidate(self, id, times):
+        """Forget the cached range spanning ``times`` of a datastream, or all
+        of it if there are none or they cannot be read. Never raises, as the
+        write it follows may have succeeded."""
+        if self.range_cache is None:
+            return
+        try:
+            times = [to_datetime(t) for t in times]
+            start = min(times)
+            end = max(times) + timedelta(microseconds=1)
+        except (TypeError, ValueError, IndexError, KeyError):
+            self.range_cache.invalidate(id)
+        else:
+            self.range_cache.invalidate(id, start, end)
+
+    def writer(self, **kwargs):
+        """Create a background :class:`dotide.batch_writer.BatchWriter`.
+
+        :param kwargs: Thresholds passed to BatchWriter.
+        :returns: A started BatchWriter.
+
+        Usage::
+
+            >>> with client.datapoints.writer(max_points=5000) as writer:
+                    writer.write('id0', datetime.utcnow(), 1)
+        """
+        return BatchWriter(self, **kwargs)
+
+    def spool(self, directory, **kwargs):
+        """Create a durable :class:`dotide.spool.Spool` for writes.
+
+        :param str directory: Spool directory.
+        :param kwargs: Quota and batching options passed to Spool.
+        :returns: A Spool. Call its ``start()`` to replay in background.
+
+        Usage::
+
+            >>> spool = client.datapoints.spool('/var/spool/dotide').start()
+            >>> spool.create('id0', [[datetime.utcnow(), 1]])
+        """
+        return Spool(self, directory, **kwargs)
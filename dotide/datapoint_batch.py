@@ -0,0 +1,175 @@
+import math
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from .utils import parse_datetime, to_datetime
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+
+
+def to_micros(t):
+    """Convert a datetime or iso8601 string to epoch microseconds."""
+    t = to_datetime(t)
+    return (((t.toordinal() - _EPOCH_ORDINAL) * 86400 + t.hour * 3600 +
+             t.minute * 60 + t.second) * 1000000 + t.microsecond)
+
+
+def from_micros(us):
+    """Convert epoch microseconds to datetime."""
+    return _EPOCH + timedelta(microseconds=us)
+
+
+def _format_micros(us):
+    # Always with a fraction, the layout the API sends.
+    return from_micros(us).isoformat(timespec='microseconds') + 'Z'
+
+
+class DatapointBatch(object):
+
+    """Compact container of datapoints sorted by time.
+
+    Timestamps are stored as epoch microseconds in an ``array('q')`` and
+    values as floats in an ``array('d')``, 16 bytes per datapoint. Null
+    values are stored as NaN. Iterating yields ``[iso8601, value]`` lists,
+    so a batch can be used wherever a list of datapoints is expected.
+
+    :param times: Epoch microseconds, ascending.
+    :param values: Values, parallel to times.
+
+    Usage::
+
+        >>> batch = DatapointBatch.from_points(client.datapoints.filter('id0'))
+        >>> last_hour = batch.between(datetime.utcnow() - timedelta(hours=1),
+                                      datetime.utcnow())
+    """
+
+    __slots__ = ('times', 'values')
+
+    def __init__(self, times=(), values=()):
+        self.times = times if isinstance(times, array) else array('q', times)
+        self.values = values if isinstance(values, array) \
+            else array('d', values)
+        if len(self.times) != len(self.values):
+            raise ValueError('times and values differ in length')
+
+    @classmethod
+    def from_points(cls, points):
+        """Build a batch from ``[timestamp, value]`` datapoints."""
+        batch = cls()
+        for t, v in points:
+            batch.times.append(to_micros(parse_datetime(t)
+                                         if isinstance(t, str) else t))
+            batch.values.append(float('nan') if v is None else v)
+        if any(a > b for a, b in zip(batch.times, batch.times[1:])):
+            order = sorted(range(len(batch.times)),
+                           key=batch.times.__getitem__)
+            batch = cls(array('q', (batch.times[i] for i in order)),
+                        array('d', (batch.values[i] for i in order)))
+        return batch
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        for t, v in zip(self.times, self.values):
+            yield [_format_micros(t), None if math.isnan(v) else v]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.step not in (None, 1):
+                raise ValueError('DatapointBatch slices must be contiguous')
+            return DatapointBatch(self.times[index], self.values[index])
+        v = self.values[index]
+        return [_format_micros(self.times[index]),
+                None if math.isnan(v) else v]
+
+    def __eq__(self, other):
+        return isinstance(other, DatapointBatch) and \
+            self.times == other.times and \
+            [v if not math.isnan(v) else None for v in self.values] == \
+            [v if not math.isnan(v) else None for v in other.values]
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<DatapointBatch of {0} datapoints>'.format(len(self))
+
+    @property
+    def start(self):
+        """Time of the first datapoint, or None."""
+        return from_micros(self.times[0]) if self.times else None
+
+    @property
+    def end(self):
+        """Time of the last datapoint, or None."""
+        return from_micros(self.times[-1]) if self.times else None
+
+    @property
+    def nbytes(self):
+        """Bytes used by the timestamp and value buffers."""
+        return (len(self.times) * self.times.itemsize +
+                len(self.values) * self.values.itemsize)
+
+    def append(self, timestamp, value):
+        """Append a datapoint not older than the last one."""
+        t = to_micros(timestamp)
+        if self.times and t < self.times[-1]:
+            raise ValueError('datapoints must be appended in time order, '
+                             'use merge() instead')
+        self.times.append(t)
+        self.values.append(float('nan') if value is None else value)
+
+    def search(self, start=None, end=None):
+        """Return the index range ``(lo, hi)`` of ``[start, end)``."""
+        lo = 0 if start is None else bisect_left(self.times, to_micros(start))
+        hi = len(self.times) if end is None \
+            else bisect_left(self.times, to_micros(end))
+        return lo, max(lo, hi)
+
+    def between(self, start=None, end=None):
+        """Return the datapoints in ``[start, end)`` as a new batch."""
+        lo, hi = self.search(start, end)
+        return self[lo:hi]
+
+    def __add__(self, other):
+        """Concatenate a batch that starts after this one ends."""
+        if self.times and other.times and other.times[0] < self.times[-1]:
+            raise ValueError('batches overlap, use merge() instead')
+        return DatapointBatch(self.times + other.times,
+                              self.values + other.values)
+
+    def merge(self, other):
+        """Merge two batches in time order. On equal timestamps the value
+        of ``other`` wins."""
+        times, values = array('q'), array('d')
+        a, b = self.times, other.times
+        i = j = 0
+        while i < len(a) and j < len(b):
+            if a[i] < b[j]:
+                times.append(a[i])
+                values.append(self.values[i])
+                i += 1
+            else:
+                if a[i] == b[j]:
+                    i += 1
+                times.append(b[j])
+                values.append(other.values[j])
+                j += 1
+        times.extend(a[i:])
+        values.extend(self.values[i:])
+        times.extend(b[j:])
+        values.extend(other.values[j:])
+        return DatapointBatch(times, values)
+
+    def to_json(self):
+        """Encode the datapoints as a JSON array of ``[iso8601, value]``."""
+        return ('[' + ','.join(
+            '["{0}",{1}]'.format(_format_micros(t),
+                                 repr(v) if math.isfinite(v) else 'null')
+            for t, v in zip(self.times, self.values)) + ']').encode('utf-8')
+
+    def to_points(self):
+        """Return the datapoints as a list of ``[iso8601, value]``."""
+        return list(self)
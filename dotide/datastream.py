@@ -1,13 +1,19 @@
-import json
-from .utils import format_params
+from .utils import format_params, paginate
 
 
 class Datastream(object):
 
-    """Datastream."""
+    """Datastream.
 
-    def __init__(self, client):
+    :param client: A :class:`dotide.client.Client`.
+    :param cache: Optional :class:`dotide.cache.TTLCache` answering
+                  :meth:`get`. Filled by :meth:`get` and :meth:`filter`,
+                  invalidated by :meth:`update` and :meth:`delete`.
+    """
+
+    def __init__(self, client, cache=None):
         self.client = client
+        self.cache = cache
 
     def filter(self, params=None):
         """Filter Datastreams.
@@ -25,7 +31,30 @@ class Datastream(object):
         """
         if params is None:
             params = {}
-        return self.client.get('/datastreams', params=format_params(params))
+        token = self.cache.token() if self.cache is not None else None
+        datastreams = self.client.get('/datastreams',
+                                      params=format_params(params))
+        if self.cache is not None:
+            for datastream in datastreams:
+                self.cache.set(datastream['id'], datastream, token)
+        return datastreams
+
+    def iter(self, params=None, page_size=100):
+        """Iterate over all matching Datastreams, one page at a time.
+
+        :param dict params: params, as for :meth:`filter`.
+        :param int page_size: Datastreams fetched per request.
+        :returns: Generator of datastreams.
+
+        Usage::
+
+            >>> for datastream in client.datastreams.iter({'tags': ['tag0']}):
+                    print(datastream['id'])
+        """
+        def fetch(params):
+            return self.client.get('/datastreams',
+                                   params=format_params(params), stream=True)
+        return paginate(fetch, params or {}, page_size)
 
     def create(self, data):
         """Create Datastream.
@@ -41,7 +70,8 @@ class Datastream(object):
                            'properties': {'prop0': 1}
                            })
         """
-        return self.client.post('/datastreams', data=json.dumps(data))
+        return self.client.post('/datastreams',
+                                data=self.client.codec.dumps(data))
 
     def get(self, id):
         """Get a Datastream.
@@ -53,7 +83,15 @@ class Datastream(object):
 
             >>> datastream = client.datastreams.get('id0')
         """
-        return self.client.get('/datastreams/{id}'.format(id=id))
+        if self.cache is not None:
+            datastream = self.cache.get(id)
+            if datastream is not None:
+                return datastream
+            token = self.cache.token()
+        datastream = self.client.get('/datastreams/{id}'.format(id=id))
+        if self.cache is not None:
+            self.cache.set(id, datastream, token)
+        return datastream
 
     def update(self, id, data):
         """Update a Datastream.
@@ -70,8 +108,12 @@ class Datastream(object):
                           'properties': {'prop0': 1}
                           })
         """
-        return self.client.put('/datastreams/{id}'.format(id=id),
-                               data=json.dumps(data))
+        try:
+            return self.client.put('/datastreams/{id}'.format(id=id),
+                                   data=self.client.codec.dumps(data))
+        finally:
+            if self.cache is not None:
+                self.cache.pop(id)
 
     def delete(self, id):
         """Delete a Datastream.
@@ -83,4 +125,8 @@ class Datastream(object):
 
             >>> client.datastreams.delete('id0')
         """
-        return self.client.delete('/datastreams/{id}'.format(id=id))
+        try:
+            return self.client.delete('/datastreams/{id}'.format(id=id))
+        finally:
+            if self.cache is not None:
+                self.cache.pop(id)
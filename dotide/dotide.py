@@ -2,21 +2,57 @@ from .client import Client
 from .datastream import Datastream
 from .datapoint import Datapoint
 from .access_token import AccessToken
+from .cache import TTLCache
+from .range_cache import RangeCache
 
 
 class Dotide(object):
 
-    """Dotide."""
+    """Dotide.
+
+    :param str database: Database's name.
+    :param str client_id: Database's client_id.
+    :param str client_secret: Database's client_secret.
+    :param str access_token: Database's access_token.
+    :param float cache_ttl: Cache datastreams and access_tokens for this many
+                            seconds. Disabled by default.
+    :param int cache_size: Max number of cached entries per resource.
+    :param int range_cache_points: Cache up to this many datapoints for
+                                   :meth:`Datapoint.window` queries.
+                                   Disabled by default.
+    :param client_options: Connection pool, timeout and retry options passed
+                           to :class:`dotide.client.Client`.
+
+    Usage::
+
+        >>> client = Dotide('db', access_token='token',
+                            pool_maxsize=32,
+                            connect_timeout=3.05,
+                            read_timeout=30,
+                            max_retries=3)
+    """
 
     def __init__(self,
                  database,
                  client_id=None,
                  client_secret=None,
-                 access_token=None):
+                 access_token=None,
+                 cache_ttl=None,
+                 cache_size=1000,
+                 range_cache_points=None,
+                 **client_options):
         self.client = Client(database,
                              client_id=client_id,
                              client_secret=client_secret,
-                             access_token=access_token)
-        self.datastreams = Datastream(self.client)
-        self.datapoints = Datapoint(self.client)
-        self.access_tokens = AccessToken(self.client)
+                             access_token=access_token,
+                             **client_options)
+        self.datastreams = Datastream(self.client, cache=self._cache(
+            cache_ttl, cache_size))
+        self.datapoints = Datapoint(self.client, range_cache=RangeCache(
+            range_cache_points) if range_cache_points else None)
+        self.access_tokens = AccessToken(self.client, cache=self._cache(
+            cache_ttl, cache_size))
+
+    @staticmethod
+    def _cache(ttl, size):
+        return TTLCache(size, ttl) if ttl else None
@@ -0,0 +1,355 @@
+import json
+import re
+import threading
+import uuid
+from array import array
+from base64 import b64decode
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from urllib.parse import urlsplit, unquote
+from .datapoint_batch import DatapointBatch, from_micros, to_micros
+from .transport import MemoryTransport
+from .utils import parse_datetime
+
+_ROUTES = [
+    (re.compile(r'^/v2/[^/]+/datastreams$'), 'datastreams'),
+    (re.compile(r'^/v2/[^/]+/datastreams/([^/]+)$'), 'datastream'),
+    (re.compile(r'^/v2/[^/]+/datastreams/([^/]+)/datapoints$'), 'datapoints'),
+    (re.compile(r'^/v2/[^/]+/datastreams/([^/]+)/datapoints/([^/]+)$'),
+     'datapoint'),
+    (re.compile(r'^/v2/[^/]+/access_tokens$'), 'access_tokens'),
+    (re.compile(r'^/v2/[^/]+/access_tokens/([^/]+)$'), 'access_token'),
+]
+_PERMISSIONS = {'GET': 'read', 'POST': 'write', 'PUT': 'write',
+                'DELETE': 'delete'}
+_NAN = float('nan')
+
+
+class FakeError(Exception):
+
+    """An error response of the fake backend."""
+
+    def __init__(self, status, message):
+        super(FakeError, self).__init__(message)
+        self.status = status
+
+
+def _micros(v):
+    """Epoch microseconds of an iso8601 string, with or without fraction."""
+    if not isinstance(v, str):
+        raise FakeError(400, 'Invalid time {0!r}'.format(v))
+    try:
+        return to_micros(parse_datetime(v))
+    except ValueError:
+        raise FakeError(400, 'Invalid time {0!r}'.format(v))
+
+
+def _format(us):
+    return from_micros(us).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def _now():
+    return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def _split(v):
+    """A comma separated query value or a list, as a list."""
+    if v is None:
+        return None
+    return v.split(',') if isinstance(v, str) else list(v)
+
+
+def _page(query, total):
+    """Index range ``[offset, offset + limit)`` clipped to ``total``."""
+    offset = int(query.get('offset') or 0)
+    limit = int(query.get('limit') or 100)
+    return min(offset, total), min(offset + limit, total)
+
+
+class FakeBackend(object):
+
+    """In-memory implementation of the Dotide v2 API.
+
+    Datastreams are kept in id order and the datapoints of each one in a
+    :class:`dotide.datapoint_batch.DatapointBatch`, 16 bytes per point, so
+    range queries are bisections and appending in time order is amortized
+    constant time. Tens of millions of points fit in a few hundred MB.
+
+    Basic auth with ``client_id`` and ``client_secret`` has full access.
+    Bearer tokens created through the access_tokens API are limited to
+    their scopes: GET needs 'read', POST and PUT 'write', DELETE 'delete',
+    on a global scope or one naming the datastream's id or one of its tags.
+
+    :param str client_id: Client id accepted for basic auth, any if None.
+    :param str client_secret: Client secret accepted for basic auth.
+    :param bool check_auth: Whether to check credentials and scopes.
+    :param bool auto_create: Create missing datastreams on datapoint writes
+                             instead of answering 404.
+
+    Usage::
+
+        >>> backend = FakeBackend('id', 'secret')
+        >>> client = Dotide('db', client_id='id', client_secret='secret',
+                            transport=backend.transport())
+    """
+
+    def __init__(self, client_id=None, client_secret=None, check_auth=True,
+                 auto_create=False):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.check_auth = check_auth
+        self.auto_create = auto_create
+        self.datastreams = {}
+        self.series = {}  #: Datastream id to DatapointBatch.
+        self.access_tokens = {}
+        self._ids = []  # sorted datastream ids
+        self._lock = threading.Lock()
+
+    def transport(self):
+        """A :class:`dotide.transport.MemoryTransport` on this backend."""
+        return MemoryTransport(self.handle)
+
+    def handle(self, method, url, params, data, headers):
+        """Answer a request.
+
+        :param str url: Full URL or path, e.g. '/v2/db/datastreams'.
+        :param dict params: Query parameters.
+        :param str data: JSON body, or None.
+        :param headers: Request headers.
+        :returns: ``(status_code, body)``.
+        """
+        path = urlsplit(url).path
+        for pattern, name in _ROUTES:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            handler = getattr(self, '_{0}_{1}'.format(name, method.lower()),
+                              None)
+            if handler is None:
+                return 405, {'message': 'Method Not Allowed'}
+            args = [unquote(g) for g in match.groups()]
+            try:
+                body = json.loads(data) if data else None
+            except ValueError:
+                return 400, {'message': 'Invalid JSON'}
+            try:
+                scopes = self._authorize(headers)
+                with self._lock:
+                    return handler(scopes, params or {}, body, *args)
+            except FakeError as e:
+                return e.status, {'message': str(e)}
+        return 404, {'message': 'Not Found'}
+
+    # auth
+
+    def _authorize(self, headers):
+        """Scopes of the caller, None for full access."""
+        if not self.check_auth:
+            return None
+        auth = headers.get('Authorization') or ''
+        if auth.startswith('Basic '):
+            client_id, _, secret = b64decode(
+                auth[6:]).decode('utf-8').partition(':')
+            if self.client_id is None or \
+                    (client_id, secret) == (self.client_id,
+                                            self.client_secret):
+                return None
+        elif auth.startswith('Bearer '):
+            token = self.access_tokens.get(auth[7:])
+            if token is not None:
+                return token.get('scopes') or []
+        raise FakeError(401, 'Unauthorized')
+
+    @staticmethod
+    def _allowed(scopes, permission, datastream):
+        if scopes is None:
+            return True
+        tags = set(datastream.get('tags') or ())
+        for scope in scopes:
+            if permission not in scope.get('permissions', ()):
+                continue
+            if scope.get('global') or \
+                    datastream['id'] in (scope.get('ids') or ()) or \
+                    tags & set(scope.get('tags') or ()):
+                return True
+        return False
+
+    def _datastream(self, scopes, method, id):
+        datastream = self.datastreams.get(id)
+        if datastream is None:
+            raise FakeError(404, 'Not Found')
+        if not self._allowed(scopes, _PERMISSIONS[method], datastream):
+            raise FakeError(403, 'Forbidden')
+        return datastream
+
+    # datastreams
+
+    def _datastreams_get(self, scopes, query, body):
+        ids = _split(query.get('ids'))
+        tags = _split(query.get('tags'))
+        tags = set(tags) if tags else None
+        candidates = sorted(set(ids) & set(self.datastreams)) \
+            if ids is not None else self._ids
+        items = [self.datastreams[id] for id in candidates]
+        items = [d for d in items
+                 if (tags is None or tags & set(d.get('tags') or ())) and
+                 self._allowed(scopes, 'read', d)]
+        lo, hi = _page(query, len(items))
+        return 200, [dict(d) for d in items[lo:hi]]
+
+    def _datastreams_post(self, scopes, query, body):
+        if not isinstance(body, dict):
+            raise FakeError(400, 'Invalid datastream')
+        datastream = dict(body)
+        datastream.setdefault('id', uuid.uuid4().hex)
+        if datastream['id'] in self.datastreams:
+            raise FakeError(409, 'Conflict')
+        if not self._allowed(scopes, 'write', datastream):
+            raise FakeError(403, 'Forbidden')
+        datastream['created_at'] = datastream['updated_at'] = _now()
+        self.datastreams[datastream['id']] = datastream
+        self.series[datastream['id']] = DatapointBatch()
+        insort(self._ids, datastream['id'])
+        return 201, dict(datastream)
+
+    def _datastream_get(self, scopes, query, body, id):
+        return 200, dict(self._datastream(scopes, 'GET', id))
+
+    def _datastream_put(self, scopes, query, body, id):
+        datastream = self._datastream(scopes, 'PUT', id)
+        if not isinstance(body, dict):
+            raise FakeError(400, 'Invalid datastream')
+        datastream.update((k, v) for k, v in body.items()
+                          if k not in ('id', 'created_at'))
+        datastream['updated_at'] = _now()
+        return 200, dict(datastream)
+
+    def _datastream_delete(self, scopes, query, body, id):
+        self._datastream(scopes, 'DELETE', id)
+        del self.datastreams[id]
+        del self.series[id]
+        del self._ids[bisect_left(self._ids, id)]
+        return 204, None
+
+    # datapoints
+
+    def _window(self, series, query):
+        start, end = query.get('start'), query.get('end')
+        lo = bisect_left(series.times, _micros(start)) \
+            if start is not None else 0
+        hi = bisect_right(series.times, _micros(end)) \
+            if end is not None else len(series.times)
+        return lo, max(lo, hi)
+
+    def _datapoints_get(self, scopes, query, body, id):
+        self._datastream(scopes, 'GET', id)
+        series = self.series[id]
+        lo, hi = self._window(series, query)
+        first, last = _page(query, hi - lo)
+        if query.get('order') == 'desc':
+            indexes = range(hi - 1 - first, hi - 1 - last, -1)
+        else:
+            indexes = range(lo + first, lo + last)
+        times, values = series.times, series.values
+        return 200, [[_format(times[i]),
+                      None if values[i] != values[i] else values[i]]
+                     for i in indexes]
+
+    def _datapoints_post(self, scopes, query, body, id):
+        if self.auto_create and id not in self.datastreams:
+            self._datastreams_post(scopes, query, {'id': id})
+        self._datastream(scopes, 'POST', id)
+        if not isinstance(body, list):
+            raise FakeError(400, 'Invalid datapoints')
+        times, values = array('q'), array('d')
+        try:
+            for t, v in body:
+                if v is not None and (isinstance(v, bool) or
+                                      not isinstance(v, (int, float))):
+                    raise FakeError(400, 'Invalid value {0!r}'.format(v))
+                times.append(_micros(t))
+                values.append(_NAN if v is None else v)
+        except (TypeError, ValueError):
+            raise FakeError(400, 'Invalid datapoints')
+        batch = DatapointBatch(times, values)
+        if any(a >= b for a, b in zip(times, times[1:])):
+            # Sort, the last write of a timestamp wins.
+            last = {}
+            for i, t in enumerate(times):
+                last[t] = i
+            order = sorted(last)
+            batch = DatapointBatch(array('q', order),
+                                   array('d', (values[last[t]]
+                                               for t in order)))
+        series = self.series[id]
+        if not series.times or not batch.times or \
+                batch.times[0] > series.times[-1]:
+            series.times.extend(batch.times)
+            series.values.extend(batch.values)
+        else:
+            self.series[id] = series.merge(batch)
+        return 201, body
+
+    def _datapoints_delete(self, scopes, query, body, id):
+        self._datastream(scopes, 'DELETE', id)
+        series = self.series[id]
+        lo, hi = self._window(series, query)
+        del series.times[lo:hi]
+        del series.values[lo:hi]
+        return 204, None
+
+    def _datapoint_get(self, scopes, query, body, id, t):
+        self._datastream(scopes, 'GET', id)
+        series = self.series[id]
+        us = _micros(t)
+        i = bisect_left(series.times, us)
+        if i == len(series.times) or series.times[i] != us:
+            raise FakeError(404, 'Not Found')
+        v = series.values[i]
+        return 200, [_format(us), None if v != v else v]
+
+    # access tokens
+
+    def _tokens(self, scopes):
+        if scopes is not None:
+            raise FakeError(403, 'Forbidden')
+
+    def _access_tokens_get(self, scopes, query, body):
+        self._tokens(scopes)
+        items = sorted(self.access_tokens.values(),
+                       key=lambda d: d['access_token'])
+        lo, hi = _page(query, len(items))
+        return 200, [dict(d) for d in items[lo:hi]]
+
+    def _access_tokens_post(self, scopes, query, body):
+        self._tokens(scopes)
+        if not isinstance(body, dict):
+            raise FakeError(400, 'Invalid access token')
+        token = dict(body, access_token=uuid.uuid4().hex)
+        token.setdefault('scopes', [])
+        token['created_at'] = token['updated_at'] = _now()
+        self.access_tokens[token['access_token']] = token
+        return 201, dict(token)
+
+    def _access_token(self, scopes, token):
+        self._tokens(scopes)
+        if token not in self.access_tokens:
+            raise FakeError(404, 'Not Found')
+        return self.access_tokens[token]
+
+    def _access_token_get(self, scopes, query, body, token):
+        return 200, dict(self._access_token(scopes, token))
+
+    def _access_token_put(self, scopes, query, body, token):
+        access_token = self._access_token(scopes, token)
+        if not isinstance(body, dict):
+            raise FakeError(400, 'Invalid access token')
+        access_token.update((k, v) for k, v in body.items()
+                            if k not in ('access_token', 'created_at'))
+        access_token['updated_at'] = _now()
+        return 200, dict(access_token)
+
+    def _access_token_delete(self, scopes, query, body, token):
+        self._access_token(scopes, token)
+        del self.access_tokens[token]
+        return 204, None
@@ -0,0 +1,173 @@
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime
+from .utils import parse_datetime, to_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class _FollowState(object):
+
+    """Last timestamp seen and current poll interval of a datastream."""
+
+    def __init__(self, since, interval):
+        self.last = to_datetime(since) if since is not None \
+            else datetime.utcnow()
+        self.interval = interval
+
+
+def poll(datapoints, id, state, min_interval, max_interval, page_size=1000):
+    """Fetch the datapoints after ``state.last`` and adapt the interval.
+
+    The interval halves, down to ``min_interval``, while data arrives and
+    doubles, up to ``max_interval``, while it does not. Points at or before
+    the last timestamp seen are dropped, so boundary points are never
+    returned twice.
+
+    :returns: List of new datapoints.
+    """
+    points = []
+    # state.last only moves once the whole fetch succeeded, so a failed
+    # one is retried from the same point rather than skipping data.
+    last = state.last
+    for point in datapoints.iter(id, start=state.last, page_size=page_size):
+        t = parse_datetime(point[0])
+        if t > last:
+            points.append(point)
+            last = t
+    state.last = last
+    if points:
+        state.interval = max(min_interval, state.interval / 2.0)
+    else:
+        state.interval = min(max_interval, state.interval * 2.0)
+    return points
+
+
+def follow(datapoints, id, since=None, min_interval=1.0, max_interval=30.0,
+           page_size=1000, stop=None):
+    """Yield new datapoints of a datastream as they arrive.
+
+    See :meth:`dotide.datapoint.Datapoint.follow`.
+    """
+    state = _FollowState(since, min_interval)
+    while stop is None or not stop.is_set():
+        for point in poll(datapoints, id, state, min_interval, max_interval,
+                          page_size):
+            yield point
+        if stop is None:
+            time.sleep(state.interval)
+        elif stop.wait(state.interval):
+            return
+
+
+class Follower(object):
+
+    """Poll many datastreams from a small pool of threads.
+
+    Each datastream is polled on its own adaptive interval. Due datastreams
+    are taken from a schedule by ``workers`` threads, and new datapoints are
+    passed to ``callback(id, points)``.
+
+    :param datapoints: A :class:`dotide.datapoint.Datapoint` instance.
+    :param list ids: Datastream ids.
+    :param callback: Called with ``(id, points)`` for every batch of new
+                     datapoints.
+    :param since: Only report datapoints after this time, default now.
+    :param int workers: Number of polling threads.
+    :param float min_interval: Shortest delay between polls of a datastream.
+    :param float max_interval: Longest delay between polls of a datastream.
+
+    Usage::
+
+        >>> follower = client.datapoints.follow_many(['id0', 'id1'], on_points)
+        >>> follower.stop()
+    """
+
+    def __init__(self,
+                 datapoints,
+                 ids,
+                 callback,
+                 since=None,
+                 workers=4,
+                 min_interval=1.0,
+                 max_interval=30.0,
+                 page_size=1000):
+        self.datapoints = datapoints
+        self.callback = callback
+        self.since = since
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.page_size = page_size
+        self._states = {}
+        self._schedule = []  # heap of (due, id)
+        self._cond = threading.Condition(threading.Lock())
+        self._stopped = False
+        for id in ids:
+            self.add(id)
+        self._threads = [threading.Thread(target=self._run,
+                                          name='dotide-follower')
+                         for _ in range(workers)]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def add(self, id):
+        """Start following a datastream."""
+        with self._cond:
+            if id in self._states:
+                return
+            self._states[id] = _FollowState(self.since, self.min_interval)
+            heapq.heappush(self._schedule, (time.time(), id))
+            self._cond.notify()
+
+    def remove(self, id):
+        """Stop following a datastream."""
+        with self._cond:
+            self._states.pop(id, None)
+
+    def stop(self):
+        """Stop all polling threads."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _next(self):
+        """Wait for the next due datastream, or None once stopped."""
+        with self._cond:
+            while not self._stopped:
+                if self._schedule:
+                    due, id = self._schedule[0]
+                    delay = due - time.time()
+                    if delay <= 0:
+                        heapq.heappop(self._schedule)
+                        if id in self._states:
+                            return id, self._states[id]
+                        continue
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            id, state = item
+            try:
+                points = poll(self.datapoints, id, state, self.min_interval,
+                              self.max_interval, self.page_size)
+                if points:
+                    self.callback(id, points)
+            except Exception:
+                logger.exception('Failed to poll datastream %s', id)
+                state.interval = min(self.max_interval, state.interval * 2.0)
+            with self._cond:
+                if self._states.get(id) is state:
+                    heapq.heappush(self._schedule,
+                                   (time.time() + state.interval, id))
+                    self._cond.notify()
@@ -0,0 +1,172 @@
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from .client import COMPRESS_WBITS
+from .codec import encode_datapoints
+from .columnar import _from_pandas, is_columnar
+
+# Codec and Content-Encoding of the current encoder process.
+_worker = {}
+
+
+def _init_worker(codec, compress):
+    _worker['codec'] = codec
+    _worker['compress'] = compress
+
+
+def encode_chunk(data, codec, compress=None):
+    """Serialize, and optionally compress, datapoints to a request body.
+
+    :param data: List of datapoints, a DatapointBatch or a
+                 ``(timestamps, values)`` tuple of numpy arrays.
+    :param codec: Codec used for lists of datapoints.
+    :param str compress: 'gzip', 'deflate' or None.
+    :returns: Body bytes.
+    """
+    body = encode_datapoints(data, codec)
+    if compress:
+        compressor = zlib.compressobj(6, zlib.DEFLATED,
+                                      COMPRESS_WBITS[compress])
+        body = compressor.compress(body) + compressor.flush()
+    return body
+
+
+def _mp_context():
+    """Start method of the encoder processes. Forking a process whose
+    background threads, e.g. of a BatchWriter or Follower, hold locks may
+    deadlock the child, so workers are started from a fork server, or
+    spawned where there is none."""
+    import multiprocessing
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        'forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _encode_in_worker(data):
+    return encode_chunk(data, _worker['codec'], _worker['compress'])
+
+
+def _chunks(data, size):
+    """Split ``(id, datapoints)`` pairs into ``(id, chunk)`` of at most
+    ``size`` datapoints."""
+    items = data.items() if isinstance(data, dict) else data
+    for id, points in items:
+        if is_columnar(points) and not isinstance(points, tuple):
+            points = _from_pandas(points)
+        if isinstance(points, tuple):
+            timestamps, values = points
+            for i in range(0, len(timestamps), size):
+                yield id, (timestamps[i:i + size], values[i:i + size])
+        else:
+            for i in range(0, len(points), size):
+                yield id, points[i:i + size]
+
+
+def _count(chunk):
+    return len(chunk[0]) if isinstance(chunk, tuple) else len(chunk)
+
+
+def ingest(datapoints, data, processes=None, threads=None, chunk_points=10000,
+           max_pending=None):
+    """Bulk load datapoints, serializing them in a pool of processes.
+
+    Datapoints are cut into chunks of ``chunk_points``. Worker processes
+    encode each chunk to JSON and compress it when the client compresses
+    request bodies, so the CPU-bound work runs outside the GIL of the
+    calling process. Only the encoded bytes come back, and they are sent
+    from a pool of ``threads`` I/O threads. At most ``max_pending`` chunks
+    are encoded or uploaded at a time, so memory stays bounded however
+    much data is given. Chunks of a datastream may be uploaded in any
+    order.
+
+    DatapointBatch and numpy arrays go to the workers as raw buffers and
+    are cheap to hand over. Lists of datapoints have to be pickled by the
+    calling process first.
+
+    :param datapoints: A :class:`dotide.datapoint.Datapoint` instance.
+    :param data: Dict, or iterable of pairs, of datastream id to datapoints
+                 in any form :meth:`dotide.datapoint.Datapoint.create`
+                 accepts.
+    :param int processes: Encoder processes, default the number of CPUs.
+                          0 encodes on the I/O threads instead.
+    :param int threads: Upload threads, default the client's
+                        ``pool_maxsize``.
+    :param int chunk_points: Max datapoints per request.
+    :param int max_pending: Max chunks in flight, default twice the number
+                            of processes plus threads.
+    :returns: ``(counts, errors)``, dicts of id to the number of datapoints
+              uploaded and id to the first exception raised for it.
+    """
+    client = datapoints.client
+    compress = client.compress
+    threads = threads or client.pool_maxsize
+    if processes is None:
+        processes = os.cpu_count() or 1
+    encoders = None
+    if processes:
+        # Imported here so that ``import dotide`` does not load
+        # multiprocessing.
+        from concurrent.futures.process import ProcessPoolExecutor
+        encoders = ProcessPoolExecutor(processes, mp_context=_mp_context(),
+                                       initializer=_init_worker,
+                                       initargs=(client.codec, compress))
+    slots = threading.BoundedSemaphore(
+        max_pending or 2 * (processes + threads))
+    lock = threading.Lock()
+    counts = {}
+    errors = {}
+
+    def done(id, n, error=None):
+        with lock:
+            if error is None:
+                counts[id] = counts.get(id, 0) + n
+            else:
+                errors.setdefault(id, error)
+        slots.release()
+
+    def upload(id, n, body):
+        try:
+            client.post('/datastreams/{id}/datapoints'.format(id=id),
+                        data=body, content_encoding=compress)
+        except Exception as e:
+            done(id, n, e)
+        else:
+            done(id, n)
+        finally:
+            if datapoints.range_cache is not None:
+                datapoints.range_cache.invalidate(id)
+
+    def encode_and_upload(id, chunk):
+        try:
+            body = encode_chunk(chunk, client.codec, compress)
+        except Exception as e:
+            return done(id, _count(chunk), e)
+        upload(id, _count(chunk), body)
+
+    def encoded(id, n, future):
+        try:
+            body = future.result()
+        except Exception as e:
+            return done(id, n, e)
+        try:
+            uploaders.submit(upload, id, n, body)
+        except Exception as e:
+            done(id, n, e)
+
+    uploaders = ThreadPoolExecutor(max_workers=threads)
+    try:
+        for id, chunk in _chunks(data, chunk_points):
+            slots.acquire()
+            n = _count(chunk)
+            if encoders is None:
+                uploaders.submit(encode_and_upload, id, chunk)
+                continue
+            future = encoders.submit(_encode_in_worker, chunk)
+            future.add_done_callback(
+                lambda f, id=id, n=n: encoded(id, n, f))
+    finally:
+        if encoders is not None:
+            encoders.shutdown(wait=True)
+        uploaders.shutdown(wait=True)
+    return counts, errors
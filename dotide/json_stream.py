@@ -0,0 +1,87 @@
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(chunks):
+    """Decode a JSON array from byte chunks, yielding elements as they
+    complete.
+
+    Only the unparsed tail of the body is buffered, so memory stays around
+    one chunk plus the element being decoded. A body that is not an array
+    is yielded as a single value.
+
+    :param chunks: Iterable of bytes, e.g. ``response.iter_content()``.
+    :returns: Generator of decoded elements.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    eof = False
+
+    def more():
+        for chunk in chunks:
+            text = decoder.decode(chunk)
+            if text:
+                return text
+        return decoder.decode(b'', final=True) or None
+
+    def skip(buf, pos, chars):
+        while pos < len(buf) and buf[pos] in chars:
+            pos += 1
+        return pos
+
+    # Find the opening bracket.
+    while True:
+        pos = skip(buf, pos, _WHITESPACE)
+        if pos < len(buf):
+            break
+        text = more()
+        if text is None:
+            return
+        buf, pos = text, 0
+    if buf[pos] != '[':
+        rest = buf[pos:]
+        for text in iter(more, None):
+            rest += text
+        yield json.loads(rest)
+        return
+    pos += 1
+    expect_comma = False
+
+    while True:
+        pos = skip(buf, pos, _WHITESPACE)
+        if pos < len(buf) and buf[pos] == ']':
+            return
+        if expect_comma and pos < len(buf):
+            if buf[pos] != ',':
+                raise ValueError('Expecting "," at char {0}'.format(pos))
+            pos += 1
+            expect_comma = False
+            continue
+        if pos < len(buf):
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except ValueError:
+                end = None
+            # A value is only complete once a ',' or ']' follows it: a
+            # number cut after its integer part, e.g. '325.' + '0', is
+            # still a valid number on its own.
+            after = skip(buf, end, _WHITESPACE) if end is not None else None
+            if end is not None and (eof or (after < len(buf) and
+                                            buf[after] in ',]')):
+                yield value
+                pos = end
+                expect_comma = True
+                continue
+        if eof:
+            raise ValueError('Unterminated JSON array')
+        text = more()
+        if text is None:
+            eof = True
+        else:
+            buf = buf[pos:] + text
+            pos = 0
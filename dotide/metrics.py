@@ -0,0 +1,110 @@
+import threading
+from bisect import bisect_left
+
+#: Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, float('inf'))
+
+# Collection name -> placeholder for the path segment that follows it.
+_PLACEHOLDERS = {
+    'datastreams': '{id}',
+    'datapoints': '{t}',
+    'access_tokens': '{access_token}',
+}
+
+
+def path_template(path):
+    """Replace ids in an API path by placeholders.
+
+    Usage::
+
+        >>> path_template('/datastreams/id0/datapoints')
+        '/datastreams/{id}/datapoints'
+    """
+    segments = path.split('/')
+    for i in range(1, len(segments)):
+        placeholder = _PLACEHOLDERS.get(segments[i - 1])
+        if placeholder is not None and segments[i] and \
+                segments[i] not in _PLACEHOLDERS:
+            segments[i] = placeholder
+    return '/'.join(segments)
+
+
+class MetricsCollector(object):
+
+    """Collect per endpoint request metrics from :class:`dotide.client.Client`
+    hooks.
+
+    Requests are grouped by method and :func:`path_template`, and each group
+    keeps a latency histogram, byte counts, errors and retries.
+
+    Usage::
+
+        >>> metrics = MetricsCollector()
+        >>> metrics.install(client.client)
+        >>> client.datapoints.filter('id0')
+        >>> metrics.snapshot()['GET /datastreams/{id}/datapoints']['count']
+        1
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def install(self, client):
+        """Register the collector on a client."""
+        client.hooks['after_response'].append(self.after_response)
+
+    def uninstall(self, client):
+        """Remove the collector from a client."""
+        client.hooks['after_response'].remove(self.after_response)
+
+    def after_response(self, event):
+        """Record a finished request."""
+        key = '{0} {1}'.format(event['method'], path_template(event['path']))
+        elapsed = event['elapsed']
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = {
+                    'count': 0,
+                    'errors': 0,
+                    'retries': 0,
+                    'request_bytes': 0,
+                    'response_bytes': 0,
+                    'latency_sum': 0.0,
+                    'latency_max': 0.0,
+                    'latency_buckets': [0] * len(self.buckets),
+                    'status_codes': {},
+                }
+            stats['count'] += 1
+            stats['retries'] += event['retries']
+            stats['request_bytes'] += event['request_bytes']
+            stats['response_bytes'] += event['response_bytes'] or 0
+            stats['latency_sum'] += elapsed
+            stats['latency_max'] = max(stats['latency_max'], elapsed)
+            stats['latency_buckets'][bisect_left(self.buckets, elapsed)] += 1
+            status = event['status_code']
+            if event['error'] is not None or (status and status >= 400):
+                stats['errors'] += 1
+            if status is not None:
+                codes = stats['status_codes']
+                codes[status] = codes.get(status, 0) + 1
+
+    def snapshot(self):
+        """Return a copy of the metrics as a dict keyed by endpoint."""
+        with self._lock:
+            result = {}
+            for key, stats in self._endpoints.items():
+                stats = dict(stats)
+                stats['latency_buckets'] = list(zip(self.buckets,
+                                                    stats['latency_buckets']))
+                stats['status_codes'] = dict(stats['status_codes'])
+                result[key] = stats
+            return result
+
+    def reset(self):
+        """Drop all recorded metrics."""
+        with self._lock:
+            self._endpoints.clear()
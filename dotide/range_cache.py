@@ -0,0 +1,150 @@
+import itertools
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Unique across series, so a token never matches a recreated series.
+_generations = itertools.count()
+
+
+class _Series(object):
+
+    """Cached datapoints of one datastream and the ``[start, end)`` ranges
+    they fully cover."""
+
+    def __init__(self):
+        self.times = []  # sorted datetimes
+        self.points = []  # datapoints, parallel to times
+        self.ranges = []  # sorted, disjoint [start, end) pairs
+        self.generation = next(_generations)
+
+    def gaps(self, start, end):
+        gaps = []
+        cursor = start
+        for s, e in self.ranges:
+            if e <= cursor:
+                continue
+            if s >= end:
+                break
+            if s > cursor:
+                gaps.append((cursor, s))
+            cursor = max(cursor, e)
+            if cursor >= end:
+                break
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def insert(self, start, end, times, points):
+        lo = bisect_left(self.times, start)
+        hi = bisect_left(self.times, end)
+        self.times[lo:hi] = times
+        self.points[lo:hi] = points
+        merged = []
+        for s, e in sorted(self.ranges + [(start, end)]):
+            if merged and s <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+            else:
+                merged.append((s, e))
+        self.ranges = merged
+        return len(times) - (hi - lo)
+
+    def remove(self, start, end):
+        lo = bisect_left(self.times, start)
+        hi = bisect_left(self.times, end)
+        del self.times[lo:hi]
+        del self.points[lo:hi]
+        ranges = []
+        for s, e in self.ranges:
+            if e <= start or s >= end:
+                ranges.append((s, e))
+                continue
+            if s < start:
+                ranges.append((s, start))
+            if e > end:
+                ranges.append((end, e))
+        self.ranges = ranges
+        self.generation = next(_generations)
+        return hi - lo
+
+    def clear(self):
+        count = len(self.points)
+        self.times, self.points, self.ranges = [], [], []
+        self.generation = next(_generations)
+        return count
+
+    def slice(self, start, end):
+        return self.points[bisect_left(self.times, start):
+                           bisect_left(self.times, end)]
+
+
+class RangeCache(object):
+
+    """Client-side cache of datapoint time ranges.
+
+    For every datastream it keeps a sorted series and the ``[start, end)``
+    ranges known to be complete. A lookup reports only the gaps that still
+    have to be fetched. When more than ``max_points`` datapoints are held,
+    the least recently used datastreams are evicted, and a datastream
+    holding more than ``max_points`` on its own is not cached.
+
+    :param int max_points: Max number of cached datapoints.
+    """
+
+    def __init__(self, max_points=1000000):
+        self.max_points = max_points
+        self.points = 0  #: Number of cached datapoints.
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+
+    def gaps(self, id, start, end):
+        """Return the uncovered ``(start, end)`` sub-ranges and a token to
+        pass to :meth:`fill`."""
+        with self._lock:
+            series = self._series.get(id)
+            if series is None:
+                series = self._series[id] = _Series()
+            self._series.move_to_end(id)
+            return series.gaps(start, end), series.generation
+
+    def fill(self, id, start, end, times, points, token):
+        """Store the complete datapoints of ``[start, end)``.
+
+        Ignored if the datastream was invalidated or evicted since
+        :meth:`gaps` returned ``token``.
+        """
+        with self._lock:
+            series = self._series.get(id)
+            if series is None or series.generation != token:
+                return
+            self._series.move_to_end(id)
+            self.points += series.insert(start, end, times, points)
+            while self.points > self.max_points and len(self._series) > 1:
+                _, evicted = self._series.popitem(last=False)
+                self.points -= len(evicted.points)
+            if self.points > self.max_points:
+                # Larger than the whole cache on its own: not kept.
+                self.points -= series.clear()
+
+    def get(self, id, start, end):
+        """Return cached datapoints in ``[start, end)``."""
+        with self._lock:
+            series = self._series.get(id)
+            return list(series.slice(start, end)) if series else []
+
+    def invalidate(self, id, start=None, end=None):
+        """Forget ``[start, end)`` of a datastream, or all of it."""
+        with self._lock:
+            series = self._series.get(id)
+            if series is None:
+                return
+            if start is None or end is None:
+                self.points -= series.clear()
+            else:
+                self.points -= series.remove(start, end)
+
+    def clear(self):
+        """Forget everything."""
+        with self._lock:
+            self._series.clear()
+            self.points = 0
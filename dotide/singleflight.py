@@ -0,0 +1,65 @@
+import threading
+
+
+class _Call(object):
+
+    """A call in flight and its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+
+    """Share one execution between concurrent calls with the same key.
+
+    The first caller of a key runs the function; callers arriving while it
+    runs wait and receive the same result, or the same exception. Nothing
+    is cached once the call returns. Waiting callers get the very object
+    the first caller got, so results must not be mutated.
+
+    Usage::
+
+        >>> flight = SingleFlight()
+        >>> flight.do(('GET', '/datastreams/id0'), fetch)
+    """
+
+    def __init__(self):
+        self.calls = 0  #: Calls that ran the function.
+        self.coalesced = 0  #: Calls that waited for another one instead.
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Run ``func()`` unless a call with ``key`` is in flight, and return
+        its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Return call counters and the number of calls in flight."""
+        return {'calls': self.calls, 'coalesced': self.coalesced,
+                'in_flight': len(self._calls)}
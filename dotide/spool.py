@@ -0,0 +1,309 @@
+import json
+import logging
+import os
+import threading
+from urllib.parse import quote, unquote
+from .codec import encode_datapoints
+from .transport import connection_errors, http_errors
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_SUFFIX = '.seg'
+_CHECKPOINT = 'checkpoint'
+
+
+class SpoolFullError(Exception):
+
+    """Raised when appending would exceed the spool's disk quota."""
+
+
+def _is_transient(e):
+    """Whether a failed write should be spooled and retried later."""
+    if isinstance(e, connection_errors()):
+        return True
+    if isinstance(e, http_errors()):
+        r = e.response
+        return r is None or r.status_code == 429 or r.status_code >= 500
+    return False
+
+
+class _Stream(object):
+
+    """Spool state of one datastream: its directory, the segment being
+    appended to and the replay checkpoint."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.replay_lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        segments = self.segments()
+        self.active = segments[-1] if segments else 0
+        self.file = open(self.path(self.active), 'ab')
+        self._repair()
+        self.checkpoint = self._read_checkpoint(segments)
+        # Drained segments left behind by a crash before their removal.
+        for seq in segments:
+            if seq < self.checkpoint[0]:
+                os.remove(self.path(seq))
+
+    def path(self, seq):
+        return os.path.join(self.directory,
+                            '{0:020d}{1}'.format(seq, _SEGMENT_SUFFIX))
+
+    def segments(self):
+        return sorted(int(name[:-len(_SEGMENT_SUFFIX)])
+                      for name in os.listdir(self.directory)
+                      if name.endswith(_SEGMENT_SUFFIX))
+
+    def _repair(self):
+        """Cut a record torn by a crash off the end of the active segment."""
+        path = self.path(self.active)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data and not data.endswith(b'\n'):
+            self.file.close()
+            with open(path, 'r+b') as f:
+                f.truncate(data.rfind(b'\n') + 1)
+            self.file = open(path, 'ab')
+
+    def _read_checkpoint(self, segments):
+        try:
+            with open(os.path.join(self.directory, _CHECKPOINT)) as f:
+                checkpoint = json.load(f)
+            return checkpoint['segment'], checkpoint['offset']
+        except (IOError, OSError, ValueError, KeyError):
+            return (segments[0] if segments else 0), 0
+
+    def save_checkpoint(self, seq, offset, fsync):
+        path = os.path.join(self.directory, _CHECKPOINT)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'segment': seq, 'offset': offset}, f)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        self.checkpoint = (seq, offset)
+
+    def pending(self):
+        seq, offset = self.checkpoint
+        return seq < self.active or offset < self.file.tell()
+
+
+class Spool(object):
+
+    """Durable write-ahead spool for datapoint writes.
+
+    Writes that fail with a connection error, timeout, 429 or 5xx response
+    are appended to a segment file of their datastream under ``directory``,
+    one JSON record per line. :meth:`replay` (or the background thread of
+    :meth:`start`) drains them oldest first in bulk uploads of up to
+    ``batch_points`` points, saving a checkpoint after each upload so a
+    crash replays at most one batch again. Replay reads the segments without
+    holding the append lock, so new writes are never blocked by it.
+
+    :param datapoints: A :class:`dotide.datapoint.Datapoint` instance.
+    :param str directory: Spool directory, created if missing.
+    :param int max_bytes: Disk quota for all segments.
+    :param int segment_bytes: Size at which a new segment file is started.
+    :param int batch_points: Max datapoints per replayed upload.
+    :param bool fsync: fsync every record and checkpoint.
+
+    Usage::
+
+        >>> spool = Spool(client.datapoints, '/var/spool/dotide').start()
+        >>> spool.create('id0', [[datetime.utcnow(), 1]])
+    """
+
+    def __init__(self,
+                 datapoints,
+                 directory,
+                 max_bytes=1 << 30,
+                 segment_bytes=16 << 20,
+                 batch_points=10000,
+                 fsync=True):
+        self.datapoints = datapoints
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.batch_points = batch_points
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._streams = {}
+        self._bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        for name in os.listdir(directory):
+            if os.path.isdir(os.path.join(directory, name)):
+                stream = self._stream(unquote(name))
+                self._bytes += sum(os.path.getsize(stream.path(seq))
+                                   for seq in stream.segments())
+
+    def _stream(self, id):
+        with self._lock:
+            stream = self._streams.get(id)
+            if stream is None:
+                stream = self._streams[id] = _Stream(
+                    os.path.join(self.directory, quote(id, safe='')))
+            return stream
+
+    @property
+    def size(self):
+        """Bytes held in segment files."""
+        return self._bytes
+
+    def pending(self, id=None):
+        """Whether spooled datapoints wait for replay."""
+        with self._lock:
+            streams = list(self._streams.items())
+        return any(stream.pending() for sid, stream in streams
+                   if id is None or sid == id)
+
+    def create(self, id, data):
+        """Create datapoints, spooling them if the API is unreachable.
+
+        Datapoints of a datastream with spooled writes are appended behind
+        them, so replay keeps the order of writes.
+
+        :returns: Created datapoints, or None if spooled.
+        """
+        with self._lock:
+            stream = self._streams.get(id)
+        if stream is None or not stream.pending():
+            try:
+                return self.datapoints.create(id, data)
+            except Exception as e:
+                if not _is_transient(e):
+                    raise
+        self.append(id, data)
+        return None
+
+    def append(self, id, data):
+        """Queue datapoints for replay.
+
+        :raises SpoolFullError: If the disk quota would be exceeded.
+        """
+        record = encode_datapoints(data, self.datapoints.client.codec) + b'\n'
+        stream = self._stream(id)
+        with self._lock:
+            if self._bytes + len(record) > self.max_bytes:
+                raise SpoolFullError('spool holds {0} bytes'.format(
+                    self._bytes))
+            self._bytes += len(record)
+        with stream.lock:
+            if stream.file.tell() >= self.segment_bytes:
+                stream.file.close()
+                stream.active += 1
+                stream.file = open(stream.path(stream.active), 'ab')
+            stream.file.write(record)
+            stream.file.flush()
+            if self.fsync:
+                os.fsync(stream.file.fileno())
+
+    def replay(self):
+        """Upload spooled datapoints of every datastream.
+
+        A datastream whose upload fails with a transient error does not
+        stop the others from being replayed.
+
+        :returns: Number of datapoints uploaded.
+        :raises: The first transient error, once every datastream was tried.
+        """
+        with self._lock:
+            ids = list(self._streams)
+        uploaded = 0
+        error = None
+        for id in ids:
+            try:
+                uploaded += self._replay(id)
+            except Exception as e:
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+        return uploaded
+
+    def _replay(self, id):
+        stream = self._stream(id)
+        uploaded = 0
+        with stream.replay_lock:
+            while True:
+                seq, offset = stream.checkpoint
+                path = stream.path(seq)
+                # Only whole records below ``end`` are read; appends go on
+                # behind it without waiting for the replay.
+                with stream.lock:
+                    active = stream.active
+                    end = stream.file.tell() if seq == active \
+                        else os.path.getsize(path)
+                points = []
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    while len(points) < self.batch_points and f.tell() < end:
+                        line = f.readline()
+                        if not line.endswith(b'\n'):
+                            break
+                        points.extend(json.loads(line.decode('utf-8')))
+                    position = f.tell()
+                if points:
+                    try:
+                        self.datapoints.create(id, points)
+                    except Exception as e:
+                        if _is_transient(e):
+                            raise
+                        logger.exception('Dropped %d spooled datapoints of %s',
+                                         len(points), id)
+                    uploaded += len(points)
+                if seq < active and position >= end:
+                    stream.save_checkpoint(seq + 1, 0, self.fsync)
+                    os.remove(path)
+                    with self._lock:
+                        self._bytes -= end
+                    continue
+                if position != offset:
+                    stream.save_checkpoint(seq, position, self.fsync)
+                if position >= end:
+                    self._retire(stream, seq, end)
+                    return uploaded
+                if position == offset:
+                    return uploaded
+
+    def _retire(self, stream, seq, end):
+        """Start a new active segment once all ``end`` bytes of the current
+        one are replayed, and release them from the quota."""
+        with stream.lock:
+            if not end or stream.active != seq or stream.file.tell() != end:
+                return
+            stream.file.close()
+            stream.active += 1
+            stream.file = open(stream.path(stream.active), 'ab')
+        stream.save_checkpoint(seq + 1, 0, self.fsync)
+        os.remove(stream.path(seq))
+        with self._lock:
+            self._bytes -= end
+
+    def start(self, interval=5.0):
+        """Replay from a background thread every ``interval`` seconds."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.replay()
+                except Exception:
+                    logger.debug('Spool replay interrupted', exc_info=True)
+        self._thread = threading.Thread(target=run, name='dotide-spool')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the replay thread and close segment files."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            for stream in self._streams.values():
+                with stream.lock:
+                    stream.file.close()
@@ -0,0 +1,402 @@
+import json
+import select
+import socket
+import sys
+import threading
+import zlib
+import http.client as httplib
+from urllib.parse import urlencode, urlsplit
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+class TransportError(IOError):
+
+    """Base class of the errors raised by the transports of this module."""
+
+    def __init__(self, *args, **kwargs):
+        self.response = kwargs.pop('response', None)
+        super(TransportError, self).__init__(*args, **kwargs)
+
+
+class ConnectionError(TransportError):
+
+    """The server could not be reached or dropped the connection."""
+
+
+class Timeout(TransportError):
+
+    """The server did not answer in time."""
+
+
+class HTTPError(TransportError):
+
+    """The server answered with a 4xx or 5xx status."""
+
+
+def connection_errors():
+    """Connection error and timeout classes of every loaded transport."""
+    errors = (ConnectionError, Timeout)
+    requests = sys.modules.get('requests')
+    if requests is not None:
+        errors += (requests.exceptions.ConnectionError,
+                   requests.exceptions.Timeout)
+    return errors
+
+
+def http_errors():
+    """HTTP error classes of every loaded transport."""
+    requests = sys.modules.get('requests')
+    if requests is not None:
+        return (HTTPError, requests.exceptions.HTTPError)
+    return (HTTPError,)
+
+
+def _dropped(conn):
+    """Whether an idle connection was closed by the server. An idle socket
+    is only readable at EOF or if the server sent something unasked."""
+    if conn.sock is None:
+        return True
+    try:
+        return bool(select.select([conn.sock], [], [], 0)[0])
+    except (ValueError, OSError):
+        return True
+
+
+def _drain(raw, limit=64 * 1024):
+    """Read what is left of a response body, up to ``limit`` bytes.
+
+    :returns: Whether the body was read to the end.
+    """
+    try:
+        while limit > 0 and not raw.isclosed():
+            chunk = raw.read(min(limit, 8192))
+            if not chunk:
+                break
+            limit -= len(chunk)
+        return raw.isclosed()
+    except (socket.error, httplib.HTTPException):
+        return False
+
+
+class Response(object):
+
+    """Response of :class:`HTTPTransport` and :class:`MemoryTransport`.
+
+    It has the subset of ``requests.Response`` used by the client:
+    ``status_code``, ``reason``, ``headers``, ``content``, ``iter_content``
+    and ``close``.
+    """
+
+    def __init__(self, status_code, headers=None, content=None, reason='',
+                 raw=None, release=None):
+        self.status_code = status_code
+        self.headers = headers if headers is not None else {}
+        self.reason = reason
+        self._content = content
+        self._raw = raw
+        self._release = release
+
+    @property
+    def content(self):
+        """The whole decoded body."""
+        if self._content is None:
+            self._content = b''.join(self.iter_content(64 * 1024))
+        return self._content
+
+    def iter_content(self, chunk_size=1):
+        """Yield the decoded body in chunks."""
+        if self._content is not None:
+            for i in range(0, len(self._content), chunk_size):
+                yield self._content[i:i + chunk_size]
+            return
+        encoding = self.headers.get('Content-Encoding')
+        decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS) \
+            if encoding in ('gzip', 'deflate') else None
+        raw, self._raw = self._raw, None
+        if raw is None:
+            return
+        try:
+            while True:
+                chunk = raw.read(chunk_size)
+                if not chunk:
+                    break
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk)
+                if chunk:
+                    yield chunk
+            if decompressor is not None:
+                chunk = decompressor.flush()
+                if chunk:
+                    yield chunk
+        except socket.timeout as e:
+            self._finish(False)
+            raise Timeout(e)
+        except (socket.error, httplib.HTTPException) as e:
+            self._finish(False)
+            raise ConnectionError(e)
+        except GeneratorExit:
+            # Abandoned early, e.g. at the closing bracket of a streamed
+            # array: a short remainder is drained to keep the connection.
+            self._finish(_drain(raw))
+            raise
+        except BaseException:
+            self._finish(False)
+            raise
+        self._finish(True)
+
+    def _finish(self, reusable):
+        if self._release is not None:
+            release, self._release = self._release, None
+            release(reusable)
+
+    def close(self):
+        """Release the connection. A connection whose body was not read to
+        the end is closed rather than reused."""
+        self._raw = None
+        self._finish(False)
+
+
+class Transport(object):
+
+    """Sends the requests of a :class:`dotide.client.Client`.
+
+    Subclasses implement :meth:`request` and name the exceptions they raise
+    in ``errors`` (failures worth a retry) and ``HTTPError`` (raised by the
+    client for 4xx and 5xx responses).
+    """
+
+    errors = (ConnectionError, Timeout)
+    HTTPError = HTTPError
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                timeout=None, stream=False):
+        """Send a request.
+
+        :param str url: Full URL without query string.
+        :param dict params: Query parameters, None values are dropped.
+        :param data: Body, bytes, str or an iterable of bytes sent with
+                     chunked transfer encoding.
+        :param dict headers: Request headers.
+        :param tuple timeout: ``(connect, read)`` timeouts in seconds.
+        :param bool stream: Whether the body will be read with
+                            ``iter_content`` instead of ``content``.
+        :returns: A response with ``status_code``, ``reason``, ``headers``,
+                  ``content``, ``iter_content`` and ``close``.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Close pooled connections."""
+
+
+class RequestsTransport(Transport):
+
+    """Transport over ``requests``.
+
+    ``requests`` is imported when the transport is created, not when
+    :mod:`dotide` is imported. With ``per_thread``, every thread gets its
+    own ``requests.Session``; all sessions share one ``HTTPAdapter`` and so
+    one connection pool.
+
+    :param int pool_connections: Number of connection pools to cache.
+    :param int pool_maxsize: Max connections kept alive per pool.
+    :param bool per_thread: Use a session per thread, default True.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, per_thread=True):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.errors = (requests.exceptions.ConnectionError,
+                       requests.exceptions.Timeout)
+        self.HTTPError = requests.exceptions.HTTPError
+        self._requests = requests
+        self._adapter = HTTPAdapter(pool_connections=pool_connections,
+                                    pool_maxsize=pool_maxsize)
+        self._local = threading.local()
+        self._session = None if per_thread else self._new_session()
+
+    def _new_session(self):
+        session = self._requests.Session()
+        session.mount('http://', self._adapter)
+        session.mount('https://', self._adapter)
+        return session
+
+    @property
+    def session(self):
+        """The session of the calling thread. Assigning a session makes all
+        threads use it."""
+        if self._session is not None:
+            return self._session
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._new_session()
+        return session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                timeout=None, stream=False):
+        return self.session.request(method,
+                                    url,
+                                    params=params,
+                                    data=data,
+                                    headers=headers,
+                                    timeout=timeout,
+                                    stream=stream)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+        self._adapter.close()
+
+
+class HTTPTransport(Transport):
+
+    """Lean transport over ``http.client`` with persistent connections.
+
+    Idle keep-alive connections are kept in a pool per host and reused by
+    any thread, unless the server has closed them meanwhile. It skips the hooks, settings merging and request
+    preparation of ``requests``, and does not read proxy settings or
+    ``.netrc`` from the environment.
+
+    :param int pool_maxsize: Max idle connections kept per host.
+    """
+
+    def __init__(self, pool_maxsize=10):
+        self.pool_maxsize = pool_maxsize
+        self._pools = {}  # (scheme, netloc) -> idle connections
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme, netloc, timeout):
+        cls = httplib.HTTPSConnection if scheme == 'https' \
+            else httplib.HTTPConnection
+        return cls(netloc, timeout=timeout)
+
+    def _acquire(self, key):
+        while True:
+            with self._lock:
+                pool = self._pools.get(key)
+                conn = pool.pop() if pool else None
+            if conn is None or not _dropped(conn):
+                return conn
+            conn.close()
+
+    def _release(self, key, conn, reusable):
+        if reusable:
+            with self._lock:
+                pool = self._pools.setdefault(key, [])
+                if len(pool) < self.pool_maxsize:
+                    pool.append(conn)
+                    return
+        conn.close()
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                timeout=None, stream=False):
+        scheme, netloc, path, query, _ = urlsplit(url)
+        if params:
+            params = [(k, v) for k, v in params.items() if v is not None]
+            if params:
+                query = (query + '&' if query else '') + \
+                    urlencode(params, doseq=True)
+        if query:
+            path += '?' + query
+        if data is not None and not isinstance(data, bytes):
+            data = data.encode('utf-8') if hasattr(data, 'encode') \
+                else iter(data)
+        connect_timeout, read_timeout = timeout if \
+            isinstance(timeout, tuple) else (timeout, timeout)
+        key = (scheme, netloc)
+        # A pooled connection may still be closed by the server just as it
+        # is reused. Idempotent requests with a body that can be sent again
+        # are then retried on a new connection; others may have reached the
+        # server and raise.
+        conn = self._acquire(key)
+        while True:
+            reused = conn is not None
+            if conn is None:
+                conn = self._connect(scheme, netloc, connect_timeout)
+            try:
+                r = self._send(conn, method, path, data, headers or {},
+                               read_timeout)
+                break
+            except socket.timeout as e:
+                conn.close()
+                raise Timeout(e)
+            except (socket.error, httplib.HTTPException) as e:
+                conn.close()
+                if reused and method in IDEMPOTENT_METHODS and \
+                        (data is None or isinstance(data, bytes)):
+                    conn = None
+                    continue
+                raise ConnectionError(e)
+        response = Response(r.status, r.msg, reason=r.reason, raw=r,
+                            release=lambda reusable: self._release(
+                                key, conn, reusable and not r.will_close))
+        if not stream:
+            response.content
+        return response
+
+    @staticmethod
+    def _send(conn, method, path, data, headers, read_timeout):
+        if conn.sock is None:
+            conn.connect()
+        conn.sock.settimeout(read_timeout)
+        if data is not None and not isinstance(data, bytes):
+            headers = dict(headers, **{'Transfer-Encoding': 'chunked'})
+            conn.request(method, path, body=data, headers=headers,
+                         encode_chunked=True)
+        else:
+            conn.request(method, path, body=data, headers=headers)
+        return conn.getresponse()
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for conn in pool:
+                conn.close()
+
+
+class MemoryTransport(Transport):
+
+    """In-process transport for tests, no sockets involved.
+
+    Requests are passed to ``handler(method, url, params, data, headers)``
+    which returns ``(status_code, body)``, the body being bytes, str, a
+    JSON-serializable object or None. Compressed request bodies are
+    decoded before the handler sees them.
+
+    :param handler: Callable answering requests.
+
+    Usage::
+
+        >>> def handler(method, url, params, data, headers):
+        ...     return 200, {'id': 'id0'}
+        >>> client = Dotide('db', access_token='token',
+        ...                 transport=MemoryTransport(handler))
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                timeout=None, stream=False):
+        headers = headers or {}
+        if data is not None and not isinstance(data, (bytes, str)):
+            data = b''.join(data)
+        if isinstance(data, bytes):
+            if headers.get('Content-Encoding') in ('gzip', 'deflate'):
+                data = zlib.decompress(data, 32 + zlib.MAX_WBITS)
+            data = data.decode('utf-8')
+        if params:
+            params = dict((k, v) for k, v in params.items() if v is not None)
+        status, body = self.handler(method, url, params or {}, data, headers)
+        if body is not None and not isinstance(body, bytes):
+            if not isinstance(body, str):
+                body = json.dumps(body)
+            body = body.encode('utf-8')
+        return Response(status, {}, body or b'',
+                        reason=httplib.responses.get(status, ''))
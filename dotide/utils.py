@@ -1,16 +1,75 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+# Epoch integers at or above this are read as milliseconds.
+_EPOCH_MS_THRESHOLD = 10 ** 11
+# Multiplying these is cheaper than building a timedelta from arguments.
+_SECOND = timedelta(seconds=1)
+_MILLISECOND = timedelta(milliseconds=1)
 
 
 def parse_datetime(dt):
-    """Parse iso8601 format UTC time to datetime."""
+    """Parse iso8601 format UTC time, with or without a fraction of a
+    second, to datetime."""
+    # 'YYYY-MM-DDTHH:MM:SS.fffZ' or '.ffffffZ' are the layouts the API
+    # sends and the ones datetime.fromisoformat reads on every Python 3.7+,
+    # at a fraction of the cost of strptime. Anything else, such as a UTC
+    # offset, takes the strptime path, so both accept and return the same.
+    if len(dt) in (24, 27) and dt[10] == 'T' and dt[19] == '.' and \
+            dt[-1] == 'Z' and dt[20:-1].isdigit():
+        try:
+            return datetime.fromisoformat(dt[:-1])
+        except ValueError:
+            pass
+    if '.' not in dt:
+        return datetime.strptime(dt, "%Y-%m-%dT%H:%M:%SZ")
     return datetime.strptime(dt, "%Y-%m-%dT%H:%M:%S.%fZ")
 
 
+def parse_datetimes(values):
+    """Parse a sequence of timestamps to datetimes.
+
+    Accepts iso8601 UTC strings as read by :func:`parse_datetime`, epoch
+    seconds or milliseconds as integers, and datetimes (returned as is).
+
+    :param values: Iterable of timestamps.
+    :returns: List of datetime.
+    """
+    result = []
+    append = result.append
+    for v in values:
+        if type(v) is not int:
+            if isinstance(v, str):
+                append(parse_datetime(v))
+                continue
+            if isinstance(v, datetime):
+                append(v)
+                continue
+            if not isinstance(v, int) or isinstance(v, bool):
+                raise TypeError('cannot parse {0!r} as datetime'.format(v))
+        if -_EPOCH_MS_THRESHOLD < v < _EPOCH_MS_THRESHOLD:
+            append(_EPOCH + _SECOND * v)
+        else:
+            append(_EPOCH + _MILLISECOND * v)
+    return result
+
+
+def to_datetime(v):
+    """Coerce an iso8601 UTC string or datetime to datetime."""
+    return parse_datetime(v) if isinstance(v, str) else v
+
+
 def format_time(v):
     """Format time."""
     return v.isoformat() + 'Z' if isinstance(v, datetime) else v
 
 
+def format_times(values):
+    """Format a sequence of times, as :func:`format_time` does for each."""
+    return [v.isoformat() + 'Z' if isinstance(v, datetime) else v
+            for v in values]
+
+
 def format_params(params):
     """Format params."""
     def _coerce(v):
@@ -21,3 +80,24 @@ def format_params(params):
         else:
             return v
     return {k: _coerce(params[k]) for k in params}
+
+
+def paginate(fetch, params, page_size):
+    """Yield items of an offset/limit paginated listing one at a time.
+
+    :param fetch: Callable taking params and returning one page (any
+                  iterable, so streamed pages work too).
+    :param dict params: Base params, may contain a starting 'offset'.
+    :param int page_size: Items requested per page.
+    """
+    params = dict(params)
+    offset = params.pop('offset', 0)
+    while True:
+        params.update(limit=page_size, offset=offset)
+        count = 0
+        for item in fetch(params):
+            count += 1
+            yield item
+        if count < page_size:
+            return
+        offset += count
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-from distutils.core import setup
+from setuptools import setup
 
 
 setup(
@@ -9,6 +9,24 @@ setup(
     description='Official Dotide Python SDK',
     license='MIT',
     packages=['dotide'],
+    python_requires='>=3.7',
     install_requires=['requests'],
+    extras_require={
+        'async': ['aiohttp'],
+        'numpy': ['numpy'],
+        'pandas': ['numpy', 'pandas'],
+        'orjson': ['orjson'],
+        'ujson': ['ujson'],
+    },
     tests_require=['nose', 'mock'],
+    classifiers=[
+        'License :: OSI Approved :: MIT License',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: Implementation :: CPython',
+        'Programming Language :: Python :: Implementation :: PyPy',
+    ],
 )
@@ -5,4 +5,24 @@ def mock_response(status_code=200, content=None):
     r = requests.Response()
     r.status_code = status_code
     r._content = str.encode(content) if content else None
+    r._content_consumed = True
     return r
+
+
+class MockAsyncResponse(object):
+
+    def __init__(self, status=200, content=None):
+        self.status = status
+        self.reason = ''
+        self.request_info = None
+        self.history = ()
+        self._content = str.encode(content) if content else b''
+
+    async def read(self):
+        return self._content
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
@@ -57,6 +57,13 @@ class TestAccessTokens(unittest.TestCase):
         ret = self.client.access_tokens.delete(self.access_token['access_token'])
         self.assertEqual(True, ret)
 
+    def test_iter(self):
+        self.client.client.session.request.side_effect = [
+            mock_response(200, json.dumps([self.access_token] * 2)),
+            mock_response(200, json.dumps([]))]
+        access_tokens = list(self.client.access_tokens.iter(page_size=2))
+        self.assertEqual(access_tokens, [self.access_token] * 2)
+
 
 if __name__ == '__main__':
     unittest.main()
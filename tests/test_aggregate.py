@@ -0,0 +1,82 @@
+import unittest
+import math
+from datetime import datetime, timedelta
+from dotide import aggregate
+
+T0 = datetime(2014, 1, 3)
+
+
+def series(n, step=1, f=float):
+    return [[(T0 + timedelta(seconds=i * step)).isoformat() + '.000Z', f(i)]
+            for i in range(n)]
+
+
+class TestAggregate(unittest.TestCase):
+
+    """Tests for aggregate and lttb."""
+
+    def test_parse_interval(self):
+        self.assertEqual(aggregate.parse_interval('90s'),
+                         timedelta(seconds=90))
+        self.assertEqual(aggregate.parse_interval('1m'), timedelta(minutes=1))
+        self.assertEqual(aggregate.parse_interval('250ms'),
+                         timedelta(milliseconds=250))
+        with self.assertRaises(ValueError):
+            aggregate.parse_interval('1y')
+
+    def test_aggregate(self):
+        points = series(150)
+        points[3][1] = None
+        buckets = list(aggregate.aggregate(points, T0, '1m', aggregate.FUNCS))
+        self.assertEqual([b[0] for b in buckets],
+                         ['2014-01-03T00:00:00Z', '2014-01-03T00:01:00Z',
+                          '2014-01-03T00:02:00Z'])
+        first = buckets[0][1]
+        self.assertEqual((first['min'], first['max'], first['count']),
+                         (0, 59, 59))
+        self.assertEqual(first['first'], 0)
+        self.assertEqual(buckets[2][1]['last'], 149)
+        self.assertEqual(buckets[1][1]['mean'], 89.5)
+        self.assertEqual(buckets[1][1]['sum'], sum(range(60, 120)))
+
+    def test_aggregate_skips_empty_buckets(self):
+        buckets = list(aggregate.aggregate(series(3, step=120), T0, '1m',
+                                           ['count']))
+        self.assertEqual(buckets, [['2014-01-03T00:00:00Z', {'count': 1}],
+                                   ['2014-01-03T00:02:00Z', {'count': 1}],
+                                   ['2014-01-03T00:04:00Z', {'count': 1}]])
+
+    def test_aggregate_invalid_func(self):
+        with self.assertRaises(ValueError):
+            list(aggregate.aggregate(series(3), T0, '1m', ['median']))
+
+    def test_aggregate_invalid_interval(self):
+        for interval in ('0s', timedelta(0), timedelta(seconds=-1)):
+            with self.assertRaises(ValueError):
+                aggregate.aggregate(series(3), T0, interval)
+
+    def test_lttb(self):
+        points = series(1000, f=lambda i: math.sin(i / 50.0))
+        sampled = list(aggregate.lttb(points, T0, T0 + timedelta(seconds=1000),
+                                      100))
+        self.assertLessEqual(len(sampled), 100)
+        self.assertGreater(len(sampled), 90)
+        self.assertEqual(sampled[0], points[0])
+        self.assertEqual(sampled[-1], points[-1])
+        self.assertEqual(sampled, sorted(sampled))
+        self.assertGreater(max(p[1] for p in sampled), 0.99)
+        self.assertLess(min(p[1] for p in sampled), -0.99)
+
+    def test_lttb_small(self):
+        points = series(2)
+        self.assertEqual(list(aggregate.lttb(points, T0, T0, 10)), points)
+        self.assertEqual(list(aggregate.lttb([], T0, T0, 10)), [])
+        points = series(5)
+        self.assertEqual(list(aggregate.lttb(
+            points, T0, T0 + timedelta(seconds=5), 100)), points)
+        self.assertEqual(list(aggregate.lttb(
+            points, T0, T0 + timedelta(seconds=5), 5)), points)
+
+
+if __name__ == '__main__':
+    unittest.main()
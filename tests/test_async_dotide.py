@@ -0,0 +1,95 @@
+import unittest
+import asyncio
+import json
+import mock
+from datetime import datetime
+from .helper import MockAsyncResponse
+
+try:
+    import aiohttp
+    from dotide.async_dotide import AsyncDotide
+except ImportError:
+    aiohttp = None
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class TestAsyncDotide(unittest.TestCase):
+
+    """Tests for AsyncDotide."""
+
+    def setUp(self):
+        self.client = AsyncDotide(database='db',
+                                  client_id='id',
+                                  client_secret='secret')
+        self.session = mock.Mock()
+        self.session.closed = False
+        self.client.client.session = self.session
+        self.datapoint = ['2014-01-03T00:01:02.123Z', 100]
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    def test_init(self):
+        self.assertEqual(self.client.client.database, 'db')
+        self.assertTrue(
+            self.client.client.headers['Authorization'].startswith('Basic '))
+
+    def test_datapoints_filter(self):
+        self.session.request.return_value = MockAsyncResponse(
+            200, json.dumps([self.datapoint]))
+        datapoints = self.run_async(self.client.datapoints.filter('id'))
+        self.assertEqual(datapoints, [self.datapoint])
+        args = self.session.request.call_args[0]
+        self.assertEqual(args, (
+            'GET', 'https://api.dotide.com/v2/db/datastreams/id/datapoints'))
+
+    def test_datapoints_create(self):
+        self.session.request.return_value = MockAsyncResponse(
+            201, json.dumps([self.datapoint]))
+        datapoints = self.run_async(
+            self.client.datapoints.create('id', [self.datapoint]))
+        self.assertEqual(datapoints, [self.datapoint])
+
+    def test_datastreams_delete(self):
+        self.session.request.return_value = MockAsyncResponse(204)
+        ret = self.run_async(self.client.datastreams.delete('id'))
+        self.assertEqual(True, ret)
+
+    def test_access_tokens_get(self):
+        self.session.request.return_value = MockAsyncResponse(
+            200, json.dumps({'access_token': 'token'}))
+        token = self.run_async(self.client.access_tokens.get('token'))
+        self.assertEqual(token, {'access_token': 'token'})
+
+    def test_error(self):
+        self.session.request.return_value = MockAsyncResponse(
+            404, json.dumps({'message': 'Not Found'}))
+        with self.assertRaises(aiohttp.ClientResponseError):
+            self.run_async(self.client.datastreams.get('id'))
+
+    def test_error_without_message(self):
+        for content in ['<html>Bad Gateway</html>', '{"error": 1}', '[]']:
+            r = MockAsyncResponse(502, content)
+            r.reason = 'Bad Gateway'
+            self.session.request.return_value = r
+            with self.assertRaises(aiohttp.ClientResponseError) as cm:
+                self.run_async(self.client.datastreams.get('id'))
+            self.assertEqual(cm.exception.status, 502)
+            self.assertEqual(cm.exception.message, 'Bad Gateway')
+
+    def test_malformed_body(self):
+        self.session.request.return_value = MockAsyncResponse(200, '[1,2')
+        with self.assertRaises(ValueError):
+            self.run_async(self.client.datastreams.filter())
+
+    def test_datapoints_create_datetimes(self):
+        self.session.request.return_value = MockAsyncResponse(201, '[]')
+        self.run_async(self.client.datapoints.create(
+            'id', [[datetime(2014, 1, 3, 0, 1, 2, 123000), 1]]))
+        self.assertEqual(
+            json.loads(self.session.request.call_args[1]['data']),
+            [['2014-01-03T00:01:02.123000Z', 1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import mock
+import json
+from dotide import Dotide
+from dotide.batch_writer import BufferFullError
+from .helper import mock_response
+
+
+class TestBatchWriter(unittest.TestCase):
+
+    """Tests for BatchWriter."""
+
+    def setUp(self):
+        self.client = Dotide(database='db',
+                             client_id='id',
+                             client_secret='secret')
+        self.client.client.session = mock.Mock()
+        self.client.client.session.request.return_value = mock_response(
+            201, json.dumps([]))
+
+    def _posted(self):
+        return [(c[0][1], json.loads(c[1]['data']))
+                for c in self.client.client.session.request.call_args_list]
+
+    def test_flush_on_close_merges_duplicates(self):
+        writer = self.client.datapoints.writer(max_age=60)
+        writer.write('id0', '2014-01-03T00:01:02.123Z', 1)
+        writer.write('id0', '2014-01-03T00:01:03.123Z', 2)
+        writer.write('id0', '2014-01-03T00:01:02.123Z', 3)
+        writer.write('id1', '2014-01-03T00:01:02.123Z', 4)
+        writer.close()
+        posted = dict(self._posted())
+        self.assertEqual(
+            posted['https://api.dotide.com/v2/db/datastreams/id0/datapoints'],
+            [['2014-01-03T00:01:02.123Z', 3], ['2014-01-03T00:01:03.123Z', 2]])
+        self.assertEqual(
+            posted['https://api.dotide.com/v2/db/datastreams/id1/datapoints'],
+            [['2014-01-03T00:01:02.123Z', 4]])
+
+    def test_flush_on_size(self):
+        with self.client.datapoints.writer(max_points=2, max_age=60) as writer:
+            writer.extend('id0', [['2014-01-03T00:01:0{0}.000Z'.format(i), i]
+                                  for i in range(5)])
+        points = [p for _, batch in self._posted() for p in batch]
+        self.assertEqual(len(points), 5)
+        self.assertTrue(all(len(batch) <= 2 for _, batch in self._posted()))
+
+    def test_backpressure_timeout(self):
+        writer = self.client.datapoints.writer(max_points=1, max_buffered=1,
+                                               max_age=60)
+        writer._due = lambda: False
+        writer.write('id0', '2014-01-03T00:01:02.123Z', 1)
+        with self.assertRaises(BufferFullError):
+            writer.write('id0', '2014-01-03T00:01:03.123Z', 2, timeout=0.05)
+        writer.close()
+        self.assertEqual(len(self._posted()), 1)
+
+    def test_write_after_close(self):
+        writer = self.client.datapoints.writer()
+        writer.close()
+        with self.assertRaises(ValueError):
+            writer.write('id0', '2014-01-03T00:01:02.123Z', 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import mock
+import json
+from dotide import Dotide
+from dotide.cache import TTLCache
+from .helper import mock_response
+
+
+class TestTTLCache(unittest.TestCase):
+
+    """Tests for TTLCache."""
+
+    def test_lru(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 1, 'size': 2})
+
+    def test_ttl(self):
+        cache = TTLCache(ttl=60)
+        with mock.patch('dotide.cache._clock', return_value=0):
+            cache.set('a', 1)
+        with mock.patch('dotide.cache._clock', return_value=61):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_stale_set(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        token = cache.token()
+        cache.pop('a')
+        cache.set('a', 'stale', token)
+        cache.set('b', 2, token)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+        cache.set('a', 'fresh', cache.token())
+        self.assertEqual(cache.get('a'), 'fresh')
+        # Keys forgotten from the invalidation log still drop old fills.
+        cache.pop('c')
+        cache.pop('d')
+        cache.set('b', 'stale', token)
+        self.assertEqual(cache.get('b'), 2)
+        token = cache.token()
+        cache.clear()
+        cache.set('b', 'stale', token)
+        self.assertIsNone(cache.get('b'))
+
+
+class TestResourceCache(unittest.TestCase):
+
+    """Tests for cached datastreams and access_tokens."""
+
+    def setUp(self):
+        self.client = Dotide(database='db', access_token='token',
+                             cache_ttl=60)
+        self.client.client.session = mock.Mock()
+        self.request = self.client.client.session.request
+        self.datastream = {'id': 'id0', 'name': 'name0'}
+
+    def test_get(self):
+        self.request.return_value = mock_response(
+            200, json.dumps(self.datastream))
+        self.client.datastreams.get('id0')
+        self.assertEqual(self.client.datastreams.get('id0'), self.datastream)
+        self.assertEqual(self.request.call_count, 1)
+        self.assertEqual(self.client.datastreams.cache.hits, 1)
+
+    def test_filter_seeds(self):
+        self.request.return_value = mock_response(
+            200, json.dumps([self.datastream]))
+        self.client.datastreams.filter()
+        self.assertEqual(self.client.datastreams.get('id0'), self.datastream)
+        self.assertEqual(self.request.call_count, 1)
+
+    def test_invalidation(self):
+        self.request.return_value = mock_response(
+            200, json.dumps(self.datastream))
+        self.client.datastreams.get('id0')
+        self.client.datastreams.update('id0', self.datastream)
+        self.client.datastreams.get('id0')
+        self.assertEqual(self.request.call_count, 3)
+        self.request.return_value = mock_response(204)
+        self.client.datastreams.delete('id0')
+        self.assertEqual(len(self.client.datastreams.cache), 0)
+
+    def test_racing_get(self):
+        def request(method, url, **kwargs):
+            # Another thread updates the datastream while this get runs.
+            if method == 'GET' and not updated:
+                updated.append(True)
+                self.client.datastreams.update('id0', {'name': 'new'})
+                return mock_response(200, json.dumps(self.datastream))
+            return mock_response(200, json.dumps(
+                {'id': 'id0', 'name': 'new'}))
+
+        updated = []
+        self.request.side_effect = request
+        self.assertEqual(self.client.datastreams.get('id0'), self.datastream)
+        self.assertEqual(self.client.datastreams.get('id0')['name'], 'new')
+
+    def test_access_token(self):
+        token = {'access_token': 'abc', 'scopes': []}
+        self.request.return_value = mock_response(200, json.dumps([token]))
+        self.client.access_tokens.filter()
+        self.assertEqual(self.client.access_tokens.get('abc'), token)
+        self.assertEqual(self.request.call_count, 1)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(Dotide('db').datastreams.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,14 @@
 import unittest
+import json
+import threading
+import zlib
+from datetime import datetime, timedelta
+import mock
+import requests
+from benchmarks.stub_server import StubServer
+from dotide import Dotide
 from dotide.client import Client
+from .helper import mock_response
 
 
 class TestClient(unittest.TestCase):
@@ -17,6 +26,7 @@ class TestClient(unittest.TestCase):
         self.assertIsNone(client.client_id)
         self.assertIsNone(client.client_secret)
         self.assertIsNone(client.access_token)
+        self.assertEqual(client.codec.name, 'json')
 
     def test_init_with_client_id_secret_db(self):
         client_id = 'id'
@@ -30,6 +40,175 @@ class TestClient(unittest.TestCase):
         self.assertEqual(client.client_secret, 'secret')
         self.assertIsNone(client.access_token)
 
+    def test_request_stream(self):
+        self.client.session = mock.Mock()
+        self.client.session.request.return_value = mock_response(
+            200, json.dumps([[1, 2], [3, 4]]))
+        items = self.client.get('/datastreams/id/datapoints', stream=True)
+        self.assertEqual(list(items), [[1, 2], [3, 4]])
+        self.assertTrue(self.client.session.request.call_args[1]['stream'])
+
+    def test_malformed_body(self):
+        self.client.session = mock.Mock()
+        self.client.session.request.return_value = mock_response(200, '[1,2')
+        with self.assertRaises(ValueError):
+            self.client.get('/datastreams')
+
+    def test_error_without_json_body(self):
+        self.client.session = mock.Mock()
+        for content in ['<html>Bad Gateway</html>', '[]', '{}']:
+            r = mock_response(502, content)
+            r.reason = 'Bad Gateway'
+            self.client.session.request.return_value = r
+            with self.assertRaises(requests.exceptions.HTTPError) as cm:
+                self.client.get('/datastreams')
+            self.assertEqual(str(cm.exception), 'Bad Gateway')
+
+    def test_pool_and_timeout(self):
+        client = Client('db', pool_maxsize=32, connect_timeout=3,
+                        read_timeout=30)
+        self.assertEqual(client.session.get_adapter(
+            'https://api.dotide.com')._pool_maxsize, 32)
+        client.session = mock.Mock()
+        client.session.request.return_value = mock_response(200, '{}')
+        client.get('/datastreams/id')
+        self.assertEqual(client.session.request.call_args[1]['timeout'],
+                         (3, 30))
+
+    @mock.patch('dotide.client.time.sleep')
+    def test_retry_status(self, sleep):
+        client = Client('db', max_retries=2)
+        client.session = mock.Mock()
+        throttled = mock_response(429, '{"message": "Too Many Requests"}')
+        throttled.headers['Retry-After'] = '2'
+        client.session.request.side_effect = [
+            throttled, mock_response(503), mock_response(200, '{}')]
+        self.assertEqual(client.get('/datastreams'), {})
+        self.assertEqual(client.session.request.call_count, 3)
+        self.assertEqual(sleep.call_args_list[0], mock.call(2.0))
+
+    @mock.patch('dotide.client.time.sleep')
+    def test_retry_exhausted(self, sleep):
+        client = Client('db', max_retries=1)
+        client.session = mock.Mock()
+        client.session.request.return_value = mock_response(
+            500, '{"message": "Internal Server Error"}')
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.get('/datastreams')
+        self.assertEqual(client.session.request.call_count, 2)
+
+    @mock.patch('dotide.client.time.sleep')
+    def test_no_retry_post_on_error(self, sleep):
+        client = Client('db', max_retries=3)
+        client.session = mock.Mock()
+        client.session.request.side_effect = \
+            requests.exceptions.ConnectionError()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.post('/datastreams', data='{}')
+        self.assertEqual(client.session.request.call_count, 1)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.get('/datastreams')
+        self.assertEqual(client.session.request.call_count, 5)
+
+    def test_compress(self):
+        client = Client('db', compress='gzip', compress_threshold=10)
+        client.session = mock.Mock()
+        client.session.request.return_value = mock_response(201, '[]')
+        body = json.dumps([['2014-01-03T00:01:02.123Z', i]
+                           for i in range(10000)])
+        client.post('/datastreams/id/datapoints', data=body)
+        kwargs = client.session.request.call_args[1]
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        compressed = b''.join(kwargs['data'])
+        self.assertLess(len(compressed), len(body) // 5)
+        self.assertEqual(zlib.decompress(compressed, 16 + zlib.MAX_WBITS),
+                         body.encode('utf-8'))
+
+    def test_compress_threshold(self):
+        client = Client('db', compress='deflate')
+        client.session = mock.Mock()
+        client.session.request.return_value = mock_response(201, '[]')
+        client.post('/datastreams/id/datapoints', data='[]')
+        kwargs = client.session.request.call_args[1]
+        self.assertEqual(kwargs['data'], '[]')
+        self.assertNotIn('Content-Encoding', kwargs['headers'])
+        self.assertNotIn('Content-Encoding', client.headers)
+
+    def test_compress_invalid(self):
+        with self.assertRaises(ValueError):
+            Client('db', compress='br')
+
+
+class TestClientThreads(unittest.TestCase):
+
+    """Stress tests of one client shared by 64 threads."""
+
+    threads = 64
+
+    def test_headers_read_only(self):
+        client = Client('db', access_token='token')
+        self.assertEqual(client.headers['Authorization'], 'Bearer token')
+        with self.assertRaises(TypeError):
+            client.headers['Authorization'] = 'Bearer other'
+
+    def test_session_per_thread(self):
+        client = Client('db')
+        shared = Client('db', session_per_thread=False)
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.extend(
+            [client.session, shared.session]))
+        thread.start()
+        thread.join()
+        self.assertIsNot(sessions[0], client.session)
+        self.assertIs(sessions[0].get_adapter('https://'),
+                      client.session.get_adapter('https://'))
+        self.assertIs(sessions[1], shared.session)
+
+    def stress(self, **options):
+        server = StubServer().start()
+        self.addCleanup(server.stop)
+        client = Dotide('db', access_token='token', host=server.host,
+                        secure=False, pool_maxsize=self.threads, **options)
+        if options.get('transport', 'requests') == 'requests':
+            client.client.session.trust_env = False
+        client.datastreams.create({'id': 'shared', 'name': 'shared'})
+        t0 = datetime(2014, 1, 3)
+        errors = []
+        start = threading.Barrier(self.threads)
+
+        def run(n):
+            try:
+                id = 'id{0}'.format(n)
+                start.wait()
+                client.datastreams.create({'id': id, 'name': id})
+                for batch in range(5):
+                    client.datapoints.create(id, [
+                        [t0 + timedelta(seconds=batch * 20 + i), n * 1000 + i]
+                        for i in range(20)])
+                    self.assertEqual(client.datastreams.get('shared')['name'],
+                                     'shared')
+                points = client.datapoints.filter(id, {'limit': 1000})
+                self.assertEqual([p[1] for p in points],
+                                 [n * 1000 + i % 20 for i in range(100)])
+                self.assertEqual(client.datastreams.get(id)['id'], id)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=run, args=(n,))
+                   for n in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(client.datastreams.filter({'limit': 1000})),
+                         self.threads + 1)
+
+    def test_stress_requests(self):
+        self.stress()
+
+    def test_stress_http(self):
+        self.stress(transport='http')
+
 
 if __name__ == '__main__':
     unittest.main()
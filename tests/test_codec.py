@@ -0,0 +1,54 @@
+import subprocess
+import sys
+import unittest
+from importlib.util import find_spec
+from datetime import datetime
+from dotide import codec
+from dotide.utils import format_time
+
+
+class TestCodec(unittest.TestCase):
+
+    """Tests for JSON codecs."""
+
+    def _check(self, c):
+        times = [datetime(2014, 1, 3), datetime(2014, 1, 3, 0, 1, 2, 123000)]
+        data = [[t, 1.5] for t in times] + [['2014-01-03T00:01:02.123Z', None]]
+        encoded = c.dumps(data)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(c.loads(encoded),
+                         [[format_time(e[0]), e[1]] for e in data])
+        self.assertEqual(c.loads(u'{"name": "é"}'), {'name': u'é'})
+
+    def test_json(self):
+        self._check(codec.get_codec('json'))
+
+    @unittest.skipIf(find_spec('orjson') is None, 'orjson is not installed')
+    def test_orjson(self):
+        self._check(codec.get_codec('orjson'))
+
+    @unittest.skipIf(find_spec('ujson') is None, 'ujson is not installed')
+    def test_ujson(self):
+        self._check(codec.get_codec('ujson'))
+
+    def test_default(self):
+        self.assertEqual(codec.get_codec().name, 'json')
+        self.assertIn(codec.get_codec('auto').name, codec.CODECS)
+        c = codec.get_codec()
+        big = 12345678901234567890123
+        self.assertEqual(c.loads(c.dumps({1: big})), {'1': big})
+
+    def test_lazy_import(self):
+        code = ('import sys, dotide; '
+                'sys.exit(bool({"orjson", "ujson"} & set(sys.modules)))')
+        self.assertEqual(subprocess.call([sys.executable, '-c', code]), 0)
+
+    def test_custom(self):
+        custom = codec.JsonCodec()
+        self.assertIs(codec.get_codec(custom), custom)
+        with self.assertRaises(ValueError):
+            codec.get_codec('yaml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import json
+from datetime import datetime
+from dotide import columnar
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestColumnar(unittest.TestCase):
+
+    """Tests for columnar datapoints."""
+
+    def test_to_arrays(self):
+        t, v = columnar.to_arrays([['2014-01-03T00:01:02.123Z', 100],
+                                   ['2014-01-03T00:01:03.000Z', None]])
+        self.assertEqual(t.dtype, np.dtype('datetime64[us]'))
+        self.assertEqual(t[0].astype(datetime),
+                         datetime(2014, 1, 3, 0, 1, 2, 123000))
+        self.assertEqual(v[0], 100.0)
+        self.assertTrue(np.isnan(v[1]))
+
+    def test_to_arrays_empty(self):
+        t, v = columnar.to_arrays([])
+        self.assertEqual(len(t), 0)
+        self.assertEqual(len(v), 0)
+
+    def test_encode_arrays(self):
+        t = np.array(['2014-01-03T00:01:02.123', '2014-01-03T00:01:03'],
+                     dtype='datetime64[ms]')
+        v = np.array([1.5, np.nan])
+        self.assertTrue(columnar.is_columnar((t, v)))
+        self.assertEqual(json.loads(columnar.encode_arrays((t, v))),
+                         [['2014-01-03T00:01:02.123000Z', 1.5],
+                          ['2014-01-03T00:01:03.000000Z', None]])
+
+    def test_encode_empty(self):
+        empty = (np.array([], dtype='datetime64[us]'), np.array([]))
+        self.assertEqual(columnar.encode_arrays(empty), '[]')
+
+    def test_is_columnar_list(self):
+        self.assertFalse(
+            columnar.is_columnar([['2014-01-03T00:01:02.123Z', 1]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
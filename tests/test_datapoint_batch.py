@@ -0,0 +1,103 @@
+import unittest
+import mock
+import json
+from datetime import datetime, timedelta
+from dotide import Dotide
+from dotide.datapoint_batch import DatapointBatch, from_micros, to_micros
+from .helper import mock_response
+
+T0 = datetime(2014, 1, 3)
+
+
+def t(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+def batch(*seconds):
+    return DatapointBatch.from_points([[t(s), s] for s in seconds])
+
+
+class TestDatapointBatch(unittest.TestCase):
+
+    """Tests for DatapointBatch."""
+
+    def test_micros(self):
+        self.assertEqual(to_micros(datetime(1970, 1, 1, 0, 0, 1, 5)), 1000005)
+        self.assertEqual(from_micros(to_micros(t(1.5))), t(1.5))
+
+    def test_from_points(self):
+        b = DatapointBatch.from_points([['2014-01-03T00:00:02.000Z', 2],
+                                        [t(1), None]])
+        self.assertEqual(len(b), 2)
+        self.assertEqual(b.nbytes, 32)
+        self.assertEqual(list(b), [['2014-01-03T00:00:01.000000Z', None],
+                                   ['2014-01-03T00:00:02.000000Z', 2.0]])
+        self.assertEqual((b.start, b.end), (t(1), t(2)))
+
+    def test_slicing(self):
+        b = batch(0, 1, 2, 3)
+        self.assertEqual(b[1:3], batch(1, 2))
+        self.assertEqual(b[-1], ['2014-01-03T00:00:03.000000Z', 3.0])
+        self.assertRaises(ValueError, lambda: b[::2])
+
+    def test_search(self):
+        b = batch(0, 1, 2, 3, 4)
+        self.assertEqual(b.search(t(1), t(3)), (1, 3))
+        self.assertEqual(b.search(t(2.5)), (3, 5))
+        self.assertEqual(b.between(end=t(2)), batch(0, 1))
+        self.assertEqual(len(b.between(t(9), t(10))), 0)
+
+    def test_append(self):
+        b = DatapointBatch()
+        b.append(t(0), 0)
+        b.append(t(1), 1)
+        self.assertEqual(b, batch(0, 1))
+        self.assertRaises(ValueError, b.append, t(0), 0)
+
+    def test_add_and_merge(self):
+        self.assertEqual(batch(0, 1) + batch(2), batch(0, 1, 2))
+        self.assertRaises(ValueError, lambda: batch(0, 2) + batch(1))
+        merged = batch(0, 2, 4).merge(DatapointBatch.from_points(
+            [[t(1), 10], [t(2), 20]]))
+        self.assertEqual(list(merged)[:3],
+                         [['2014-01-03T00:00:00.000000Z', 0.0],
+                          ['2014-01-03T00:00:01.000000Z', 10.0],
+                          ['2014-01-03T00:00:02.000000Z', 20.0]])
+        self.assertEqual(len(merged), 4)
+
+    def test_round_trip(self):
+        b = batch(0, 1.5)
+        self.assertEqual(DatapointBatch.from_points(list(b)), b)
+
+    def test_to_json(self):
+        b = DatapointBatch.from_points([[t(0), 1.5], [t(1), None]])
+        self.assertEqual(json.loads(b.to_json().decode('utf-8')),
+                         b.to_points())
+
+
+class TestDatapointBatchIO(unittest.TestCase):
+
+    """Tests for DatapointBatch with Datapoint.filter and create."""
+
+    def setUp(self):
+        self.client = Dotide(database='db', access_token='token',
+                             range_cache_points=1000)
+        self.client.client.session = mock.Mock()
+
+    def test_filter(self):
+        self.client.client.session.request.return_value = mock_response(
+            200, json.dumps([['2014-01-03T00:00:01.000Z', 1]]))
+        b = self.client.datapoints.filter('id0', as_batch=True)
+        self.assertEqual(b, batch(1))
+
+    def test_create(self):
+        self.client.client.session.request.return_value = mock_response(201)
+        with mock.patch.object(self.client.datapoints.range_cache,
+                               'invalidate') as invalidate:
+            self.client.datapoints.create('id0', batch(1, 2))
+        invalidate.assert_called_once_with(
+            'id0', t(1), t(2) + timedelta(microseconds=1))
+        body = self.client.client.session.request.call_args[1]['data']
+        self.assertEqual(json.loads(body.decode('utf-8')),
+                         [['2014-01-03T00:00:01.000000Z', 1.0],
+                          ['2014-01-03T00:00:02.000000Z', 2.0]])
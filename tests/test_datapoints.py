@@ -1,7 +1,9 @@
 import unittest
 import mock
 import json
+from datetime import datetime, timedelta
 from dotide import Dotide
+from dotide.fake import FakeBackend
 from .helper import mock_response
 
 
@@ -40,6 +42,92 @@ class TestDatapoints(unittest.TestCase):
             'id', {'start': self.datapoint[0], 'end': self.datapoint[0]})
         self.assertEqual(True, ret)
 
+    def test_iter(self):
+        pages = [
+            [['2014-01-03T00:00:01.000Z', 1], ['2014-01-03T00:00:02.000Z', 2]],
+            [['2014-01-03T00:00:02.000Z', 2], ['2014-01-03T00:00:03.000Z', 3]],
+            [['2014-01-03T00:00:03.000Z', 3]],
+        ]
+        self.client.client.session.request.side_effect = [
+            mock_response(200, json.dumps(page)) for page in pages]
+        datapoints = list(self.client.datapoints.iter(
+            'id', start='2014-01-03T00:00:00.000Z', page_size=2))
+        self.assertEqual([p[1] for p in datapoints], [1, 2, 3])
+        calls = self.client.client.session.request.call_args_list
+        self.assertEqual([c[1]['params']['start'] for c in calls],
+                         ['2014-01-03T00:00:00.000Z',
+                          '2014-01-03T00:00:02.000Z',
+                          '2014-01-03T00:00:03.000Z'])
+        self.assertTrue(all('offset' not in c[1]['params'] for c in calls))
+
+    def test_iter_page_size(self):
+        backend = FakeBackend(check_auth=False, auto_create=True)
+        client = Dotide('db', transport=backend.transport())
+        t0 = datetime(2014, 1, 3)
+        client.datapoints.create(
+            'x', [[t0 + timedelta(seconds=i), i] for i in range(5)])
+        self.assertEqual([p[1] for p in client.datapoints.iter(
+            'x', page_size=2)], [0, 1, 2, 3, 4])
+        with self.assertRaises(ValueError):
+            client.datapoints.iter('x', page_size=1)
+
+    def test_fetch_range(self):
+        t0 = datetime(2014, 1, 3)
+        stored = [[(t0 + timedelta(seconds=i)).isoformat() + '.000Z', i]
+                  for i in range(500)]
+
+        def parse(v):
+            return datetime.strptime(v[:19], '%Y-%m-%dT%H:%M:%S')
+
+        def request(method, url, params=None, **kwargs):
+            start, end = parse(params['start']), parse(params['end'])
+            page = [p for p in stored if start <= parse(p[0]) <= end]
+            return mock_response(200, json.dumps(page[:params['limit']]))
+
+        self.client.client.session.request.side_effect = request
+        datapoints = self.client.datapoints.fetch_range(
+            'id', t0, t0 + timedelta(seconds=400), page_size=50, workers=4)
+        self.assertEqual([p[1] for p in datapoints], list(range(401)))
+        datapoints = self.client.datapoints.fetch_range(
+            'id', t0, t0 + timedelta(seconds=400), page_size=50, workers=4,
+            order='desc')
+        self.assertEqual([p[1] for p in datapoints], list(range(400, -1, -1)))
+
+    def test_create_many(self):
+        def request(method, url, **kwargs):
+            if '/bad/' in url:
+                return mock_response(404, json.dumps({'message': 'Not Found'}))
+            return mock_response(201, kwargs['data'].decode('utf-8'))
+
+        self.client.client.session.request.side_effect = request
+        data = {'id{0}'.format(i): [self.datapoint] for i in range(20)}
+        data['bad'] = [self.datapoint]
+        results, errors = self.client.datapoints.create_many(data, workers=4)
+        self.assertEqual(sorted(results),
+                         sorted(k for k in data if k != 'bad'))
+        self.assertEqual(results['id0'], [self.datapoint])
+        self.assertEqual(list(errors), ['bad'])
+        self.assertEqual(str(errors['bad']), 'Not Found')
+
+    def test_filter_many(self):
+        def request(method, url, params=None, **kwargs):
+            if url.endswith('/datastreams'):
+                self.assertEqual(params['tags'], 'tag0')
+                return mock_response(200, json.dumps(
+                    [{'id': 'id0'}, {'id': 'id1'}]))
+            id = url.split('/')[-2]
+            return mock_response(200, json.dumps([[self.datapoint[0], id]]))
+
+        self.client.client.session.request.side_effect = request
+        series = self.client.datapoints.filter_many(
+            tags=['tag0'], start=self.datapoint[0], end=self.datapoint[0])
+        self.assertEqual(series, {'id0': [[self.datapoint[0], 'id0']],
+                                  'id1': [[self.datapoint[0], 'id1']]})
+        streamed = self.client.datapoints.filter_many(
+            ids=['id2'], stream=True)
+        self.assertEqual(list(streamed),
+                         [('id2', [[self.datapoint[0], 'id2']])])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -57,6 +57,15 @@ class TestDatastreams(unittest.TestCase):
         ret = self.client.datastreams.delete(self.datastream['id'])
         self.assertEqual(True, ret)
 
+    def test_iter(self):
+        self.client.client.session.request.side_effect = [
+            mock_response(200, json.dumps([self.datastream] * 2)),
+            mock_response(200, json.dumps([self.datastream]))]
+        datastreams = list(self.client.datastreams.iter(page_size=2))
+        self.assertEqual(datastreams, [self.datastream] * 3)
+        calls = self.client.client.session.request.call_args_list
+        self.assertEqual([c[1]['params']['offset'] for c in calls], [0, 2])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from datetime import datetime, timedelta
+from dotide import Dotide
+from dotide.fake import FakeBackend
+from dotide.transport import HTTPError
+
+T0 = datetime(2014, 1, 3)
+
+
+def t(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+class TestFakeBackend(unittest.TestCase):
+
+    """Tests for FakeBackend."""
+
+    def setUp(self):
+        self.backend = FakeBackend('id', 'secret')
+        self.client = Dotide('db', client_id='id', client_secret='secret',
+                             transport=self.backend.transport())
+        self.client.datastreams.create({'id': 'id0', 'tags': ['a']})
+        self.client.datastreams.create({'id': 'id1', 'tags': ['b']})
+
+    def token(self, scope):
+        token = self.client.access_tokens.create({'scopes': [scope]})
+        return Dotide('db', access_token=token['access_token'],
+                      transport=self.backend.transport())
+
+    def test_datastreams(self):
+        self.assertEqual(self.client.datastreams.get('id0')['tags'], ['a'])
+        self.assertEqual([d['id'] for d in self.client.datastreams.filter(
+            {'tags': ['b']})], ['id1'])
+        self.assertEqual([d['id'] for d in self.client.datastreams.filter(
+            {'ids': ['id1', 'id0', 'id9'], 'limit': 1, 'offset': 1})],
+            ['id1'])
+        self.client.datastreams.update('id0', {'name': 'renamed'})
+        self.assertEqual(self.client.datastreams.get('id0')['name'],
+                         'renamed')
+        self.assertTrue(self.client.datastreams.delete('id0'))
+        with self.assertRaises(HTTPError) as cm:
+            self.client.datastreams.get('id0')
+        self.assertEqual(cm.exception.response.status_code, 404)
+
+    def test_datapoints(self):
+        datapoints = self.client.datapoints
+        datapoints.create('id0', [[t(i), i] for i in range(0, 100, 2)])
+        # Out of order and overlapping writes are merged, last write wins.
+        datapoints.create('id0', [[t(3), 3], [t(1), 1], [t(2), -2]])
+        self.assertEqual(datapoints.filter('id0', {
+            'start': t(1), 'end': t(4), 'limit': 10}),
+            [['2014-01-03T00:00:01.000Z', 1], ['2014-01-03T00:00:02.000Z', -2],
+             ['2014-01-03T00:00:03.000Z', 3], ['2014-01-03T00:00:04.000Z', 4]])
+        self.assertEqual(datapoints.filter('id0', {
+            'order': 'desc', 'limit': 2, 'offset': 1}),
+            [['2014-01-03T00:01:36.000Z', 96],
+             ['2014-01-03T00:01:34.000Z', 94]])
+        self.assertEqual(datapoints.get('id0', t(2)),
+                         ['2014-01-03T00:00:02.000Z', -2])
+        self.assertEqual(len(list(datapoints.iter('id0', t(0), t(99),
+                                                  page_size=7))), 52)
+        datapoints.delete('id0', {'start': t(0), 'end': t(49)})
+        self.assertEqual(len(datapoints.filter('id0', {'limit': 1000})), 25)
+
+    def test_null_values(self):
+        self.client.datapoints.create('id0', [[t(0), None], [t(1), 1.5]])
+        self.assertEqual(self.client.datapoints.filter('id0'),
+                         [['2014-01-03T00:00:00.000Z', None],
+                          ['2014-01-03T00:00:01.000Z', 1.5]])
+
+    def test_errors(self):
+        with self.assertRaises(HTTPError) as cm:
+            self.client.datapoints.create('id9', [[t(0), 0]])
+        self.assertEqual(cm.exception.response.status_code, 404)
+        with self.assertRaises(HTTPError) as cm:
+            self.client.datapoints.create('id0', [[t(0), 'x']])
+        self.assertEqual(cm.exception.response.status_code, 400)
+        client = Dotide('db', client_id='id', client_secret='wrong',
+                        transport=self.backend.transport())
+        with self.assertRaises(HTTPError) as cm:
+            client.datastreams.get('id0')
+        self.assertEqual(cm.exception.response.status_code, 401)
+
+    def test_scopes(self):
+        client = self.token({'permissions': ['read', 'write'],
+                             'tags': ['a'], 'ids': [], 'global': False})
+        client.datapoints.create('id0', [[t(0), 0]])
+        self.assertEqual(len(client.datapoints.filter('id0')), 1)
+        self.assertEqual([d['id'] for d in client.datastreams.filter()],
+                         ['id0'])
+        for call in (lambda: client.datapoints.filter('id1'),
+                     lambda: client.datapoints.delete('id0', {}),
+                     lambda: client.access_tokens.filter()):
+            with self.assertRaises(HTTPError) as cm:
+                call()
+            self.assertEqual(cm.exception.response.status_code, 403)
+
+    def test_auto_create(self):
+        backend = FakeBackend(check_auth=False, auto_create=True)
+        client = Dotide('db', transport=backend.transport())
+        client.datapoints.create('new', [[t(0), 0]])
+        self.assertEqual(client.datastreams.get('new')['id'], 'new')
+
+    def test_append_scale(self):
+        series = self.backend.series
+        for start in range(0, 100000, 10000):
+            self.client.datapoints.create('id0', [[t(i), i] for i in range(
+                start, start + 10000)])
+        self.assertEqual(len(series['id0']), 100000)
+        self.assertEqual(series['id0'].nbytes, 1600000)
+        self.assertEqual(self.client.datapoints.filter('id0', {
+            'start': t(54321), 'limit': 1})[0][1], 54321)
@@ -0,0 +1,103 @@
+import unittest
+import threading
+import mock
+from datetime import datetime, timedelta
+from dotide.follow import Follower, _FollowState, follow, poll
+
+T0 = datetime(2014, 1, 3)
+
+
+def point(seconds):
+    return [(T0 + timedelta(seconds=seconds)).isoformat() + '.000Z', seconds]
+
+
+class FakeDatapoints(object):
+
+    def __init__(self, points):
+        self.points = points
+        self.starts = []
+
+    def iter(self, id, start=None, page_size=1000):
+        self.starts.append(start)
+        return [p for p in self.points.get(id, [])
+                if datetime.strptime(p[0], '%Y-%m-%dT%H:%M:%S.%fZ') >= start]
+
+
+class TestFollow(unittest.TestCase):
+
+    """Tests for follow and Follower."""
+
+    def test_poll(self):
+        datapoints = FakeDatapoints({'id0': [point(1), point(2)]})
+        state = _FollowState(T0, 4.0)
+        self.assertEqual(poll(datapoints, 'id0', state, 1, 8),
+                         [point(1), point(2)])
+        self.assertEqual(state.interval, 2.0)
+        self.assertEqual(state.last, T0 + timedelta(seconds=2))
+        # The boundary point is returned by the API again but not yielded.
+        self.assertEqual(poll(datapoints, 'id0', state, 1, 8), [])
+        self.assertEqual(datapoints.starts[-1], T0 + timedelta(seconds=2))
+        self.assertEqual(state.interval, 4.0)
+
+    def test_poll_failure_keeps_last(self):
+        datapoints = FakeDatapoints({'id0': [point(1), point(2)]})
+
+        def failing(id, start=None, page_size=1000):
+            yield point(1)
+            raise IOError('page 2 failed')
+
+        state = _FollowState(T0, 4.0)
+        with mock.patch.object(datapoints, 'iter', failing):
+            with self.assertRaises(IOError):
+                poll(datapoints, 'id0', state, 1, 8)
+        self.assertEqual(state.last, T0)
+        self.assertEqual(poll(datapoints, 'id0', state, 1, 8),
+                         [point(1), point(2)])
+
+    def test_follow(self):
+        datapoints = FakeDatapoints({'id0': [point(1)]})
+        stop = threading.Event()
+        generator = follow(datapoints, 'id0', since=T0, min_interval=0.01,
+                           stop=stop)
+        self.assertEqual(next(generator), point(1))
+        datapoints.points['id0'].append(point(2))
+        self.assertEqual(next(generator), point(2))
+        stop.set()
+        self.assertEqual(list(generator), [])
+
+    def test_follower(self):
+        datapoints = FakeDatapoints({'id0': [point(1)], 'id1': [point(2)]})
+        received = []
+        done = threading.Event()
+
+        def callback(id, points):
+            received.append((id, points))
+            if len(received) == 2:
+                done.set()
+
+        follower = Follower(datapoints, ['id0', 'id1'], callback, since=T0,
+                            workers=1, min_interval=0.01)
+        self.assertTrue(done.wait(5))
+        follower.stop()
+        self.assertEqual(sorted(received), [('id0', [point(1)]),
+                                            ('id1', [point(2)])])
+
+    def test_follower_keeps_polling_after_errors(self):
+        datapoints = mock.Mock()
+        retried = threading.Event()
+
+        def fail(*args, **kwargs):
+            if datapoints.iter.call_count > 1:
+                retried.set()
+            raise ValueError()
+
+        datapoints.iter.side_effect = fail
+        with mock.patch('dotide.follow.logger'):
+            follower = Follower(datapoints, ['id0'], None, min_interval=0.01,
+                                max_interval=0.02)
+            self.assertTrue(retried.wait(5))
+            follower.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
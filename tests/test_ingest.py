@@ -0,0 +1,78 @@
+import unittest
+import json
+import zlib
+from datetime import datetime, timedelta
+from dotide import Dotide
+from dotide.codec import JsonCodec
+from dotide.datapoint_batch import DatapointBatch
+from dotide.fake import FakeBackend
+from dotide.ingest import _mp_context, encode_chunk
+from dotide.transport import HTTPError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+T0 = datetime(2014, 1, 3)
+
+
+def points(n, start=0):
+    return [[T0 + timedelta(seconds=i), float(i)] for i in range(start, n)]
+
+
+class TestIngest(unittest.TestCase):
+
+    """Tests for the process-pool ingestion pipeline."""
+
+    def setUp(self):
+        self.backend = FakeBackend(check_auth=False)
+        self.client = Dotide('db', transport=self.backend.transport(),
+                             compress='gzip', range_cache_points=1000)
+        for id in ('id0', 'id1', 'id2'):
+            self.client.datastreams.create({'id': id})
+
+    def assert_stored(self, id, n):
+        series = self.backend.series[id]
+        self.assertEqual(len(series), n)
+        self.assertEqual(list(series.values), [float(i) for i in range(n)])
+
+    def test_encode_chunk(self):
+        data = points(3)
+        body = encode_chunk(data, JsonCodec(), 'gzip')
+        self.assertEqual(
+            json.loads(zlib.decompress(body, 16 + zlib.MAX_WBITS).decode()),
+            json.loads(JsonCodec().dumps(data).decode()))
+
+    def test_workers_not_forked(self):
+        self.assertIn(_mp_context().get_start_method(),
+                      ('forkserver', 'spawn'))
+
+    def test_processes(self):
+        data = {'id0': points(2500),
+                'id1': DatapointBatch.from_points(points(1200))}
+        if np is not None:
+            data['id2'] = (np.arange(700).astype('timedelta64[s]') +
+                           np.datetime64(T0), np.arange(700.0))
+        counts, errors = self.client.datapoints.ingest(
+            data, processes=2, threads=4, chunk_points=500)
+        self.assertEqual(errors, {})
+        self.assertEqual(counts, dict((id, len(v) if id != 'id2' else 700)
+                                      for id, v in data.items()))
+        self.assert_stored('id0', 2500)
+        self.assert_stored('id1', 1200)
+        if np is not None:
+            self.assert_stored('id2', 700)
+
+    def test_threads_only(self):
+        counts, errors = self.client.datapoints.ingest(
+            [('id0', points(1000)), ('id0', points(2000, 1000))],
+            processes=0, chunk_points=300, max_pending=2)
+        self.assertEqual((counts, errors), ({'id0': 2000}, {}))
+        self.assert_stored('id0', 2000)
+
+    def test_errors(self):
+        counts, errors = self.client.datapoints.ingest(
+            {'id0': points(100), 'missing': points(100)}, processes=1)
+        self.assertEqual(counts, {'id0': 100})
+        self.assertIsInstance(errors['missing'], HTTPError)
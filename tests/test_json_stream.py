@@ -0,0 +1,47 @@
+import unittest
+import json
+from dotide.json_stream import iter_json_array
+
+
+def chunked(body, size):
+    body = body.encode('utf-8')
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestJsonStream(unittest.TestCase):
+
+    """Tests for iter_json_array."""
+
+    def test_array(self):
+        data = [['2014-01-03T00:01:02.123Z', 100],
+                ['2014-01-03T00:01:03.123Z', -1.5],
+                {'name': u'é"', 'tags': []}, None, 12345]
+        body = json.dumps(data, ensure_ascii=False, indent=1)
+        for size in (1, 2, 7, len(body)):
+            self.assertEqual(list(iter_json_array(chunked(body, size))), data)
+
+    def test_every_split(self):
+        data = [['2014-01-03T00:01:02.123Z', 32500000000.0], 1e-07, -12,
+                [True, False, None], {'a': [1.5, '\u00e9']}, 'x']
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        for i in range(len(body) + 1):
+            for j in range(i, len(body) + 1):
+                chunks = [body[:i], body[i:j], body[j:]]
+                self.assertEqual(list(iter_json_array(chunks)), data)
+
+    def test_empty(self):
+        self.assertEqual(list(iter_json_array(chunked(' [ ] ', 1))), [])
+        self.assertEqual(list(iter_json_array([])), [])
+
+    def test_not_array(self):
+        self.assertEqual(list(iter_json_array(chunked('{"a": 1}', 3))),
+                         [{'a': 1}])
+
+    def test_invalid(self):
+        for body in ('[1 2]', '[1,2', '[1,,2]'):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(chunked(body, 2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import mock
+import json
+import requests
+from dotide import Dotide
+from dotide.metrics import MetricsCollector, path_template
+from .helper import mock_response
+
+
+class TestMetrics(unittest.TestCase):
+
+    """Tests for request hooks and MetricsCollector."""
+
+    def setUp(self):
+        self.client = Dotide(database='db', access_token='token')
+        self.client.client.session = mock.Mock()
+        self.metrics = MetricsCollector()
+        self.metrics.install(self.client.client)
+
+    def test_path_template(self):
+        self.assertEqual(path_template('/datastreams'), '/datastreams')
+        self.assertEqual(path_template('/datastreams/id0/datapoints'),
+                         '/datastreams/{id}/datapoints')
+        self.assertEqual(
+            path_template('/datastreams/id0/datapoints/2014-01-03T00:01:02Z'),
+            '/datastreams/{id}/datapoints/{t}')
+        self.assertEqual(path_template('/access_tokens/abc'),
+                         '/access_tokens/{access_token}')
+
+    def test_hooks(self):
+        events = []
+        self.client.client.hooks['before_request'].append(
+            lambda e: events.append(dict(e)))
+        self.client.client.session.request.return_value = mock_response(
+            200, json.dumps([]))
+        self.client.datapoints.filter('id0')
+        self.assertEqual(events[0]['path'], '/datastreams/id0/datapoints')
+        self.assertIsNone(events[0]['status_code'])
+
+    def test_stream(self):
+        events = []
+        self.client.client.hooks['after_response'].append(
+            lambda e: events.append(dict(e)))
+        body = json.dumps([{'id': 'id0'}, {'id': 'id1'}])
+        self.client.client.session.request.return_value = mock_response(
+            200, body)
+        items = self.client.client.get('/datastreams', stream=True)
+        self.assertEqual(events, [])
+        self.assertEqual(len(list(items)), 2)
+        self.assertEqual(events[0]['response_bytes'], len(body))
+        self.assertIsNone(events[0]['error'])
+
+        response = mock_response(200, body)
+        response.iter_content = mock.Mock(
+            side_effect=requests.exceptions.ChunkedEncodingError())
+        self.client.client.session.request.return_value = response
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            list(self.client.client.get('/datastreams', stream=True))
+        self.assertIsInstance(events[1]['error'],
+                              requests.exceptions.ChunkedEncodingError)
+
+    def test_snapshot(self):
+        self.client.client.session.request.return_value = mock_response(
+            201, json.dumps([['2014-01-03T00:01:02.123Z', 1]]))
+        self.client.datapoints.create('id0', [['2014-01-03T00:01:02.123Z', 1]])
+        self.client.datapoints.create('id1', [['2014-01-03T00:01:02.123Z', 1]])
+        self.client.client.session.request.return_value = mock_response(
+            404, json.dumps({'message': 'Not Found'}))
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.client.datapoints.create('id2', [])
+        stats = self.metrics.snapshot()['POST /datastreams/{id}/datapoints']
+        self.assertEqual(stats['count'], 3)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['status_codes'], {201: 2, 404: 1})
+        body = self.client.client.codec.dumps(
+            [['2014-01-03T00:01:02.123Z', 1]])
+        self.assertEqual(stats['request_bytes'], 2 * len(body) + 2)
+        self.assertEqual(sum(n for _, n in stats['latency_buckets']), 3)
+
+    def test_connection_error(self):
+        self.client.client.session.request.side_effect = \
+            requests.exceptions.ConnectionError()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client.datastreams.get('id0')
+        stats = self.metrics.snapshot()['GET /datastreams/{id}']
+        self.assertEqual(stats['errors'], 1)
+
+    def test_uninstall(self):
+        self.metrics.uninstall(self.client.client)
+        self.assertEqual(self.client.client.hooks['after_response'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import mock
+import json
+from datetime import datetime, timedelta
+from dotide import Dotide
+from dotide.range_cache import RangeCache
+from dotide.utils import format_time
+from .helper import mock_response
+
+T0 = datetime(2014, 1, 3)
+
+
+def t(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+class TestRangeCache(unittest.TestCase):
+
+    """Tests for RangeCache."""
+
+    def test_gaps_and_fill(self):
+        cache = RangeCache()
+        gaps, token = cache.gaps('id0', t(0), t(10))
+        self.assertEqual(gaps, [(t(0), t(10))])
+        cache.fill('id0', t(2), t(4), [t(2), t(3)], ['p2', 'p3'], token)
+        cache.fill('id0', t(6), t(8), [t(7)], ['p7'], token)
+        gaps, token = cache.gaps('id0', t(0), t(10))
+        self.assertEqual(gaps, [(t(0), t(2)), (t(4), t(6)), (t(8), t(10))])
+        cache.fill('id0', t(4), t(6), [t(5)], ['p5'], token)
+        self.assertEqual(cache.gaps('id0', t(2), t(8))[0], [])
+        self.assertEqual(cache.get('id0', t(3), t(8)), ['p3', 'p5', 'p7'])
+        self.assertEqual(cache.points, 4)
+
+    def test_invalidate(self):
+        cache = RangeCache()
+        gaps, token = cache.gaps('id0', t(0), t(10))
+        cache.fill('id0', t(0), t(10), [t(1), t(5)], ['p1', 'p5'], token)
+        cache.invalidate('id0', t(4), t(6))
+        self.assertEqual(cache.gaps('id0', t(0), t(10))[0], [(t(4), t(6))])
+        self.assertEqual(cache.points, 1)
+        # Fills computed before an invalidation are dropped.
+        cache.fill('id0', t(4), t(6), [t(5)], ['stale'], token)
+        self.assertEqual(cache.get('id0', t(0), t(10)), ['p1'])
+
+    def test_lru_eviction(self):
+        cache = RangeCache(max_points=2)
+        for id in ('id0', 'id1'):
+            gaps, token = cache.gaps(id, t(0), t(10))
+            cache.fill(id, t(0), t(10), [t(1), t(2)], ['a', 'b'], token)
+        self.assertEqual(cache.gaps('id0', t(0), t(10))[0], [(t(0), t(10))])
+        self.assertEqual(cache.points, 2)
+
+    def test_oversized_series_not_kept(self):
+        cache = RangeCache(max_points=2)
+        gaps, token = cache.gaps('id0', t(0), t(10))
+        cache.fill('id0', t(0), t(10), [t(1), t(2), t(3)], ['a', 'b', 'c'],
+                   token)
+        self.assertEqual(cache.points, 0)
+        self.assertEqual(cache.get('id0', t(0), t(10)), [])
+        self.assertEqual(cache.gaps('id0', t(0), t(10))[0], [(t(0), t(10))])
+        # A fill under the old token is dropped too.
+        cache.fill('id0', t(0), t(1), [t(0)], ['z'], token)
+        self.assertEqual(cache.points, 0)
+
+
+class TestDatapointWindow(unittest.TestCase):
+
+    """Tests for Datapoint.window with a range cache."""
+
+    def setUp(self):
+        self.client = Dotide(database='db', access_token='token',
+                             range_cache_points=1000)
+        self.client.client.session = mock.Mock()
+        stored = [[t(i).isoformat() + '.000Z', i] for i in range(100)]
+
+        def parse(v):
+            return datetime.strptime(v[:19], '%Y-%m-%dT%H:%M:%S')
+
+        def request(method, url, params=None, **kwargs):
+            if method != 'GET':
+                return mock_response(204)
+            start, end = parse(params['start']), parse(params['end'])
+            page = [p for p in stored if start <= parse(p[0]) <= end]
+            return mock_response(200, json.dumps(page[:params['limit']]))
+
+        self.client.client.session.request.side_effect = request
+
+    def requested(self):
+        return [(c[1]['params']['start'], c[1]['params']['end'])
+                for c in self.client.client.session.request.call_args_list
+                if c[0][0] == 'GET']
+
+    def test_window(self):
+        points = self.client.datapoints.window('id0', t(10), t(20))
+        self.assertEqual([p[1] for p in points], list(range(10, 20)))
+        points = self.client.datapoints.window('id0', t(15), t(30))
+        self.assertEqual([p[1] for p in points], list(range(15, 30)))
+        self.assertEqual(self.requested()[-1],
+                         ('2014-01-03T00:00:20Z', '2014-01-03T00:00:30Z'))
+        self.client.datapoints.window('id0', t(12), t(28))
+        self.assertEqual(len(self.requested()), 2)
+
+    def test_invalidated_by_writes(self):
+        self.client.datapoints.window('id0', t(10), t(20))
+        self.client.datapoints.create('id0', [[t(15), 1]])
+        self.client.datapoints.window('id0', t(10), t(20))
+        self.assertEqual(self.requested()[-1],
+                         ('2014-01-03T00:00:15Z',
+                          '2014-01-03T00:00:15.000001Z'))
+        self.client.datapoints.delete('id0', {})
+        self.client.datapoints.window('id0', t(10), t(20))
+        self.assertEqual(len(self.requested()), 3)
+
+    def test_window_larger_than_cache(self):
+        self.client.datapoints.range_cache.max_points = 5
+        points = self.client.datapoints.window('id0', t(10), t(20))
+        self.assertEqual([p[1] for p in points], list(range(10, 20)))
+        self.assertEqual(self.client.datapoints.range_cache.points, 0)
+
+    def test_whole_second_timestamps(self):
+        self.client.datapoints.window('id0', '2014-01-03T00:00:10Z',
+                                      '2014-01-03T00:00:20Z')
+        self.client.datapoints.create('id0', [['2014-01-03T00:00:15Z', 1],
+                                              [format_time(t(16)), 2]])
+        self.client.datapoints.window('id0', t(10), t(20))
+        self.assertEqual(self.requested()[-1],
+                         ('2014-01-03T00:00:15Z',
+                          '2014-01-03T00:00:16.000001Z'))
+
+    def test_unreadable_times_invalidate_everything(self):
+        self.client.datapoints.window('id0', t(10), t(20))
+        self.client.datapoints.create('id0', [['yesterday', 1]])
+        self.client.datapoints.window('id0', t(10), t(20))
+        self.assertEqual(len(self.requested()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
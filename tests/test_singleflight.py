@@ -0,0 +1,103 @@
+import unittest
+import threading
+import time
+from dotide.client import Client
+from dotide.singleflight import SingleFlight
+from dotide.transport import HTTPError, MemoryTransport
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.001)
+
+
+def run_threads(n, target):
+    results = [None] * n
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    """Tests for SingleFlight."""
+
+    def test_sequential_calls_run(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do('k', lambda: 1), 1)
+        self.assertEqual(flight.do('k', lambda: 2), 2)
+        self.assertEqual(flight.stats(),
+                         {'calls': 2, 'coalesced': 0, 'in_flight': 0})
+
+    def test_error_shared(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait()
+            raise ValueError('boom')
+        leader = threading.Thread(target=lambda: self.assertRaises(
+            ValueError, flight.do, 'k', fail))
+        leader.start()
+        wait_for(lambda: flight.calls == 1)
+        follower = threading.Thread(target=lambda: self.assertRaises(
+            ValueError, flight.do, 'k', fail))
+        follower.start()
+        wait_for(lambda: flight.coalesced == 1)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+
+class TestClientCoalesce(unittest.TestCase):
+
+    """Tests for Client(coalesce=True)."""
+
+    def setUp(self):
+        self.requests = []
+        self.status = 200
+        self.client = Client('db', access_token='token', coalesce=True,
+                             transport=MemoryTransport(self.handler))
+
+    def handler(self, method, url, params, data, headers):
+        self.requests.append((method, url, params))
+        # Hold the first request until the other threads are waiting on it.
+        wait_for(lambda: self.client.singleflight.coalesced >= 15)
+        return self.status, {'id': 'id0'} if self.status == 200 \
+            else {'message': 'Not Found'}
+
+    def test_concurrent_gets(self):
+        results = run_threads(16, lambda: self.client.get('/datastreams/id0'))
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(results, [{'id': 'id0'}] * 16)
+        self.assertEqual(self.client.singleflight.stats(),
+                         {'calls': 1, 'coalesced': 15, 'in_flight': 0})
+
+    def test_concurrent_errors(self):
+        self.status = 404
+        results = run_threads(16, lambda: self.client.get('/datastreams/id0'))
+        self.assertEqual(len(self.requests), 1)
+        self.assertTrue(all(isinstance(r, HTTPError) for r in results))
+
+    def test_distinct_requests(self):
+        self.client.singleflight.coalesced = 15
+        self.client.get('/datastreams', {'limit': 1})
+        self.client.get('/datastreams', {'limit': 2})
+        self.client.post('/datastreams', '{}')
+        self.client.post('/datastreams', '{}')
+        self.assertEqual(len(self.requests), 4)
+        self.assertEqual(self.client.singleflight.calls, 2)
+
+    def test_disabled(self):
+        self.assertIsNone(Client('db').singleflight)
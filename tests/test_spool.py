@@ -0,0 +1,146 @@
+import unittest
+import os
+import shutil
+import tempfile
+import mock
+import requests
+from datetime import datetime
+from dotide import utils
+from dotide.codec import JsonCodec
+from dotide.datapoint_batch import DatapointBatch
+from dotide.spool import Spool, SpoolFullError
+
+
+class TestSpool(unittest.TestCase):
+
+    """Tests for Spool."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.datapoints = mock.Mock()
+        self.datapoints.client.codec = JsonCodec()
+        self.down = requests.exceptions.ConnectionError()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def spool(self, **kwargs):
+        kwargs.setdefault('fsync', False)
+        return Spool(self.datapoints, self.directory, **kwargs)
+
+    def point(self, i):
+        return ['2014-01-03T00:00:{0:02d}.000Z'.format(i), i]
+
+    def test_create_spools_transient_errors(self):
+        spool = self.spool()
+        self.datapoints.create.side_effect = self.down
+        self.assertIsNone(spool.create('id0', [self.point(0)]))
+        self.assertTrue(spool.pending('id0'))
+        self.datapoints.create.side_effect = None
+        # Spooled streams keep their order: new writes queue behind.
+        spool.create('id0', [self.point(1)])
+        self.assertEqual(self.datapoints.create.call_count, 1)
+        self.assertEqual(spool.replay(), 2)
+        self.datapoints.create.assert_called_with(
+            'id0', [self.point(0), self.point(1)])
+        self.assertFalse(spool.pending())
+        spool.close()
+
+    def test_create_raises_client_errors(self):
+        spool = self.spool()
+        self.datapoints.create.side_effect = ValueError()
+        with self.assertRaises(ValueError):
+            spool.create('id0', [self.point(0)])
+        self.assertFalse(spool.pending())
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_replay_batches_and_segments(self):
+        spool = self.spool(segment_bytes=100, batch_points=3)
+        for i in range(10):
+            spool.append('id/0', [self.point(i)])
+        self.assertEqual(spool.replay(), 10)
+        batches = [c[0][1] for c in self.datapoints.create.call_args_list]
+        self.assertEqual([p for b in batches for p in b],
+                         [self.point(i) for i in range(10)])
+        self.assertTrue(all(len(b) <= 3 for b in batches))
+        stream_dir = os.path.join(self.directory, 'id%2F0')
+        self.assertEqual(len([n for n in os.listdir(stream_dir)
+                              if n.endswith('.seg')]), 1)
+        spool.close()
+
+    def test_replay_resumes_from_checkpoint(self):
+        spool = self.spool(batch_points=1)
+        for i in range(3):
+            spool.append('id0', [self.point(i)])
+        self.datapoints.create.side_effect = [None, self.down]
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            spool.replay()
+        spool.close()
+        # A torn record from a crash is discarded on restart.
+        with open(os.path.join(self.directory, 'id0',
+                               '{0:020d}.seg'.format(0)), 'ab') as f:
+            f.write(b'[["2014-01')
+        self.datapoints.create.reset_mock()
+        self.datapoints.create.side_effect = None
+        spool = self.spool()
+        self.assertEqual(spool.replay(), 2)
+        self.datapoints.create.assert_called_once_with(
+            'id0', [self.point(1), self.point(2)])
+        spool.close()
+
+    def test_append_columnar_and_batch(self):
+        import numpy as np
+        spool = self.spool()
+        timestamps = np.array(['2014-01-03T00:00:00', '2014-01-03T00:00:01'],
+                              dtype='datetime64[ms]')
+        spool.append('id0', (timestamps, np.array([0.0, 1.0])))
+        spool.append('id0', DatapointBatch.from_points([self.point(2)]))
+        self.assertEqual(spool.replay(), 3)
+        points = self.datapoints.create.call_args[0][1]
+        self.assertEqual([p[1] for p in points], [0.0, 1.0, 2.0])
+        self.assertEqual(utils.parse_datetimes(p[0] for p in points),
+                         [datetime(2014, 1, 3, 0, 0, i) for i in range(3)])
+        spool.close()
+
+    def test_replay_goes_past_failing_stream(self):
+        spool = self.spool()
+        spool.append('a', [self.point(0)])
+        spool.append('b', [self.point(1)])
+
+        def create(id, data):
+            if id == 'a':
+                raise self.down
+
+        self.datapoints.create.side_effect = create
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            spool.replay()
+        self.assertTrue(spool.pending('a'))
+        self.assertFalse(spool.pending('b'))
+        spool.close()
+
+    def test_quota(self):
+        spool = self.spool(max_bytes=60)
+        spool.append('id0', [self.point(0)])
+        with self.assertRaises(SpoolFullError):
+            spool.append('id0', [self.point(1)])
+        spool.close()
+
+    def test_quota_released_after_replay(self):
+        spool = self.spool(max_bytes=60)
+        for i in range(3):
+            spool.append('id0', [self.point(i)])
+            self.assertTrue(spool.pending())
+            self.assertEqual(spool.replay(), 1)
+            self.assertFalse(spool.pending())
+            self.assertEqual(spool.size, 0)
+        spool.close()
+        spool = self.spool(max_bytes=60)
+        self.assertEqual(spool.size, 0)
+        spool.append('id0', [self.point(3)])
+        self.assertEqual(spool.replay(), 1)
+        self.datapoints.create.assert_called_with('id0', [self.point(3)])
+        spool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
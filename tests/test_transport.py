@@ -0,0 +1,167 @@
+import unittest
+import gzip
+import json
+import socket
+import subprocess
+import sys
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from dotide import Dotide
+from dotide.client import Client
+from dotide.transport import ConnectionError, HTTPError, HTTPTransport, \
+    MemoryTransport
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.peers.add(self.client_address)
+        if self.path.startswith('/v2/db/missing'):
+            return self.reply(404, {'message': 'Not found'})
+        if '/datapoints' in self.path:
+            return self.reply(200, [[str(i), i] for i in range(1000)],
+                              gzip_body=True)
+        body = {'path': self.path,
+                'authorization': self.headers.get('Authorization')}
+        self.reply(200, body, gzip_body='gzip' in self.headers.get(
+            'Accept-Encoding', ''))
+
+    def do_POST(self):
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            data = b''
+            while True:
+                size = int(self.rfile.readline(), 16)
+                chunk = self.rfile.read(size + 2)[:size]
+                if not size:
+                    break
+                data += chunk
+        else:
+            data = self.rfile.read(int(self.headers['Content-Length']))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            data = zlib.decompress(data, 16 + zlib.MAX_WBITS)
+        self.server.posts.append(data)
+        if self.path.endswith('/drop') and len(self.server.posts) > 1:
+            # Read the request, then drop the connection without an answer.
+            self.close_connection = True
+            return
+        self.reply(201, json.loads(data.decode('utf-8')))
+
+    def reply(self, status, body, gzip_body=False):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        if gzip_body:
+            data = gzip.compress(data)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestHTTPTransport(unittest.TestCase):
+
+    """Tests for HTTPTransport against a local server."""
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.server.peers = set()
+        self.server.posts = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.client = Client('db', access_token='token', secure=False,
+                             host='127.0.0.1:{0}'.format(
+                                 self.server.server_port),
+                             transport='http', compress='gzip',
+                             compress_threshold=10)
+
+    def tearDown(self):
+        self.client.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get(self):
+        body = self.client.get('/datastreams', {'tags': 'a', 'limit': 10,
+                                                'offset': None})
+        self.assertTrue(body['path'].startswith('/v2/db/datastreams?'))
+        self.assertIn('tags=a', body['path'])
+        self.assertNotIn('offset', body['path'])
+        self.assertEqual(body['authorization'], 'Bearer token')
+
+    def test_keep_alive(self):
+        for _ in range(5):
+            self.client.get('/datastreams')
+        self.assertEqual(len(self.server.peers), 1)
+
+    def test_stream(self):
+        points = self.client.get('/datastreams/id/datapoints', stream=True)
+        self.assertEqual(list(points)[-1], ['999', 999])
+        # The connection is back in the pool once the body is consumed.
+        self.client.get('/datastreams')
+        self.assertEqual(len(self.server.peers), 1)
+
+    def test_post_compressed(self):
+        data = [['2014-01-03T00:01:02.123Z', i] for i in range(1000)]
+        self.assertEqual(self.client.post('/datastreams/id/datapoints',
+                                          json.dumps(data)), data)
+
+    def test_http_error(self):
+        with self.assertRaises(HTTPError) as cm:
+            self.client.get('/missing')
+        self.assertEqual(cm.exception.response.status_code, 404)
+        self.assertEqual(str(cm.exception), 'Not found')
+
+    def test_connection_error(self):
+        self.server.server_close()
+        transport = HTTPTransport()
+        with self.assertRaises(ConnectionError):
+            transport.request('GET', 'http://127.0.0.1:{0}/'.format(
+                self.server.server_port))
+
+    def test_post_not_resent(self):
+        self.client.post('/drop', data='{"a":1}')
+        with self.assertRaises(ConnectionError):
+            self.client.post('/drop', data='{"b":2}')
+        self.assertEqual(self.server.posts, [b'{"a":1}', b'{"b":2}'])
+
+    def test_dropped_idle_connection(self):
+        self.client.get('/datastreams/id0')
+        conn = self.client.transport._pools[
+            ('http', '127.0.0.1:{0}'.format(self.server.server_port))][0]
+        conn.sock.shutdown(socket.SHUT_RD)
+        self.assertEqual(self.client.post('/datastreams', data='{"c":3}'),
+                         {'c': 3})
+
+
+class TestMemoryTransport(unittest.TestCase):
+
+    """Tests for MemoryTransport."""
+
+    def test_client(self):
+        requests = []
+
+        def handler(method, url, params, data, headers):
+            requests.append((method, url, params, data))
+            return 200, {'id': 'id0'}
+
+        client = Dotide('db', access_token='token',
+                        transport=MemoryTransport(handler))
+        self.assertEqual(client.datastreams.get('id0'), {'id': 'id0'})
+        self.assertEqual(requests, [
+            ('GET', 'https://api.dotide.com/v2/db/datastreams/id0', {},
+             None)])
+
+    def test_lazy_import(self):
+        code = ("import sys, dotide; "
+                "dotide.Dotide('db', access_token='t', transport='http'); "
+                "sys.exit('requests' in sys.modules)")
+        self.assertEqual(subprocess.call([sys.executable, '-c', code]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from datetime import datetime
+from dotide import utils
+
+
+class TestUtils(unittest.TestCase):
+
+    """Tests for utils."""
+
+    def test_parse_datetime(self):
+        for s in ['2014-01-03T00:01:02.123Z', '2014-01-03T00:01:02.123456Z',
+                  '2014-01-03T00:01:02.1Z', '2014-1-3T0:1:2.12Z']:
+            self.assertEqual(utils.parse_datetime(s),
+                             datetime.strptime(s, '%Y-%m-%dT%H:%M:%S.%fZ'))
+        for dt in [datetime(2014, 1, 3, 0, 1, 2), datetime(2014, 1, 5)]:
+            self.assertEqual(utils.parse_datetime(utils.format_time(dt)), dt)
+
+    def test_parse_datetime_invalid(self):
+        for s in ['2014-01-03T00:01:02', '2014-01-03 00:01:02.123Z',
+                  '2014-13-03T00:01:02.123Z', '2014-01-03T00:01:02.123+',
+                  '2014-01-03T00:01:02.1+0100Z', '2014-01-03T00:01:02.1-01Z',
+                  '2014-01-03T00:01:02.12345+01Z']:
+            with self.assertRaises(ValueError):
+                utils.parse_datetime(s)
+
+    def test_parse_datetimes(self):
+        dt = datetime(2014, 1, 3, 0, 1, 2, 123000)
+        self.assertEqual(
+            utils.parse_datetimes(['2014-01-03T00:01:02.123Z', dt,
+                                   1388707262, 1388707262123]),
+            [dt, dt, dt.replace(microsecond=0), dt])
+        self.assertEqual(utils.parse_datetimes([-1, -100000000001]),
+                         [datetime(1969, 12, 31, 23, 59, 59),
+                          datetime(1966, 10, 31, 14, 13, 19, 999000)])
+        for v in (1.5, True):
+            with self.assertRaises(TypeError):
+                utils.parse_datetimes([v])
+
+    def test_format_times(self):
+        values = [datetime(2014, 1, 3), datetime(2014, 1, 3, 0, 0, 0, 5),
+                  '2014-01-03T00:01:02.123Z']
+        self.assertEqual(utils.format_times(values),
+                         [utils.format_time(v) for v in values])
+
+
+if __name__ == '__main__':
+    unittest.main()